@@ -3,6 +3,22 @@ from period import Period
 import json
 
 
+def _event_key(moment):
+    """
+    Returns:
+        (event type, scene/occasion ID) of the moment, or None for an HrMin moment.
+    """
+    t = moment.type
+    if t == Moment.TYPE_SCENE:
+        return t, moment.scene_id
+    elif t == Moment.TYPE_OCCASION_START:
+        return t, moment.start_of_occasion_id
+    elif t == Moment.TYPE_OCCASION_END:
+        return t, moment.end_of_occasion_id
+    else:
+        return None
+
+
 class ActTimeModel:
     """
     ActTimeModel controls when a reminder is active. It can be of one of the types:
@@ -17,13 +33,21 @@ class ActTimeModel:
             [ ( Moment,       Period), ...,
               ((start, step), Period), ... ]
             A list of (moments, period) tuples, where moments can be a list of Moments, or a
-            tuple (start, step) of int.
+            tuple (start, step) of int, meaning every `step` minutes starting `start`
+            minutes after the start of the period.
     """
 
     TYPE_MOMENTS = "moments"
     TYPE_PERIODS = "periods"
     TYPE_MOMENTS_DURING_PERIODS = "moments during periods"
 
+    # Version of the encoding produced by `to_json()`. Version 1 (no "version" key) was a
+    # textual encoding which cannot be decoded.
+    JSON_VERSION = 2
+    # Code of a (start, step) tuple in "moments during periods", distinct from the Moment
+    # type codes.
+    CODE_START_STEP = 4
+
     def __init__(self):
         self.moments = []
         self.periods = []
@@ -70,10 +94,23 @@ class ActTimeModel:
             if isinstance(mp[0], tuple):
                 assert len(mp[0]) == 2
                 assert isinstance(mp[0][0], int) and isinstance(mp[0][1], int)
+                assert mp[0][0] >= 0 and mp[0][1] > 0
         a = cls()
         a.moments_periods = moments_periods
         return a
 
+    def copy(self):
+        """
+        Returns:
+            A copy of the model, which can be modified independently. The Moments and
+            Periods are immutable, so only the lists are copied.
+        """
+        a = ActTimeModel()
+        a.moments = list(self.moments)
+        a.periods = list(self.periods)
+        a.moments_periods = list(self.moments_periods)
+        return a
+
     @property
     def type(self):
         """
@@ -89,16 +126,148 @@ class ActTimeModel:
         else:
             return None
 
+    def active_intervals(self):
+        """
+        Returns:
+            A list of (begin, end) in minutes (`end` exclusive) of the time-interval
+            periods during which the reminder is shown, for a "periods" model. Periods of
+            other types (depending on scenes/occasions), and empty intervals (span 0), are
+            not included.
+        """
+        intervals = []
+        for p in self.periods:
+            interval = p.to_minute_interval()
+            if interval is not None and interval[0] < interval[1]:
+                intervals.append(interval)
+        return intervals
+
+    def fire_ranges(self):
+        """
+        Returns:
+            A list of `range`s of minutes (0 - 2879) at which the reminder shows up, from
+              + the HrMin moments of a "moments" model,
+              + the HrMin moments and (start, step) tuples of a "moments during periods"
+                model whose periods are time intervals (limited to the periods).
+            Moments/periods depending on scenes/occasions are not included.
+        """
+        ranges = []
+        if self.moments:
+            for m in self.moments:
+                if m.type == Moment.TYPE_HRMIN:
+                    t = m.hrmin.to_minutes()
+                    ranges.append(range(t, t + 1))
+        elif self.moments_periods:
+            for mo, pe in self.moments_periods:
+                interval = pe.to_minute_interval()
+                if interval is None:
+                    continue
+                begin, end = interval
+                if isinstance(mo, tuple):
+                    ranges.append(range(begin + mo[0], end, mo[1]))
+                elif mo.type == Moment.TYPE_HRMIN:
+                    t = mo.hrmin.to_minutes()
+                    if begin <= t < end:
+                        ranges.append(range(t, t + 1))
+        return ranges
+
+    def event_keys(self):
+        """
+        Returns:
+            A set of (event type, ID) of the scene/occasion events the reminder depends on,
+            where event type is Moment.TYPE_SCENE, Moment.TYPE_OCCASION_START or
+            Moment.TYPE_OCCASION_END, and ID is the scene/occasion ID. An occasion period
+            depends on both the start and the end of the occasion.
+        """
+        moments = list(self.moments)
+        periods = list(self.periods)
+        for mo, pe in self.moments_periods:
+            if isinstance(mo, Moment):
+                moments.append(mo)
+            periods.append(pe)
+
+        keys = set()
+        for m in moments:
+            keys.add(_event_key(m))
+        for p in periods:
+            keys.add(_event_key(p.start_moment))
+            if p.type == Period.TYPE_OCCASION:
+                keys.add((Moment.TYPE_OCCASION_END, p.start_moment.start_of_occasion_id))
+        keys.discard(None)
+        return keys
+
     def to_json(self):
+        """
+        Returns:
+            A JSON string {"version": 2, "type": <type>, "data": [...]}, where data is
+              + for "moments": [Moment.encode(), ...]
+              + for "periods": [Period.encode(), ...]
+              + for "moments during periods": [[moments code, Period.encode()], ...], with
+                moments code being Moment.encode() or [4, start, step].
+            or "null" if the object is not set.
+        """
         if self.moments:
-            return json.dumps({ActTimeModel.TYPE_MOMENTS: self.moments},
-                              default=lambda x: str(x))
+            data = [m.encode() for m in self.moments]
         elif self.periods:
-            return json.dumps({ActTimeModel.TYPE_PERIODS: self.periods},
-                              default=lambda x: str(x))
+            data = [p.encode() for p in self.periods]
         elif self.moments_periods:
-            mps = [{'mo': mo, 'pe': pe} for mo, pe in self.moments_periods]
-            return json.dumps({ActTimeModel.TYPE_MOMENTS_DURING_PERIODS: mps},
-                              default=lambda x: str(x))
+            data = [[[ActTimeModel.CODE_START_STEP, mo[0], mo[1]] if isinstance(mo, tuple)
+                     else mo.encode(),
+                     pe.encode()]
+                    for mo, pe in self.moments_periods]
         else:
             return json.dumps(None)
+        return json.dumps({'version': ActTimeModel.JSON_VERSION, 'type': self.type,
+                           'data': data},
+                          separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, json_str: str):
+        """
+        Args:
+            json_str: A JSON string returned by `to_json()`.
+
+        Returns:
+            An ActTimeModel, which is not set if `json_str` is "null".
+
+        Raises:
+            ValueError: If `json_str` is not a valid encoding.
+        """
+        obj = json.loads(json_str)
+        if obj is None:
+            return cls()
+        if not isinstance(obj, dict) or obj.get('version') != ActTimeModel.JSON_VERSION:
+            raise ValueError('Unsupported encoding of ActTimeModel: {}'.format(json_str))
+
+        model_type = obj.get('type')
+        data = obj.get('data')
+        if not isinstance(data, list):
+            raise ValueError('Invalid data of ActTimeModel: {}'.format(json_str))
+        a = cls()
+        if model_type == ActTimeModel.TYPE_MOMENTS:
+            a.moments = [Moment.decode(code) for code in data]
+        elif model_type == ActTimeModel.TYPE_PERIODS:
+            a.periods = [Period.decode(code) for code in data]
+        elif model_type == ActTimeModel.TYPE_MOMENTS_DURING_PERIODS:
+            a.moments_periods = [cls._decode_moments_period(code) for code in data]
+        else:
+            raise ValueError('Invalid ActTimeModel type "{}".'.format(model_type))
+        return a
+
+    @staticmethod
+    def _decode_moments_period(code):
+        """
+        Args:
+            code: [moments code, Period code], see `to_json()`.
+
+        Returns:
+            (moments, Period), an element of `moments_periods`.
+        """
+        if not isinstance(code, list) or len(code) != 2:
+            raise ValueError('Invalid (moments, period) code {!r}.'.format(code))
+        mo, pe = code
+        if isinstance(mo, list) and len(mo) == 3 and mo[0] == ActTimeModel.CODE_START_STEP:
+            start, step = mo[1], mo[2]
+            if type(start) is not int or type(step) is not int or start < 0 or step <= 0:
+                raise ValueError('Invalid (start, step) code {!r}.'.format(mo))
+            return (start, step), Period.decode(pe)
+        return Moment.decode(mo), Period.decode(pe)
@@ -0,0 +1,161 @@
+from hrmin import HrMin
+
+
+class _Node:
+    """
+    A node of a centered interval tree. It holds the intervals containing `center`;
+    intervals entirely before/after `center` are in the left/right subtree.
+    """
+
+    __slots__ = ('center', 'by_begin', 'by_end', 'left', 'right')
+
+    def __init__(self, intervals):
+        """
+        Args:
+            intervals: A non-empty list of (begin, end, reminder_id), with begin < end.
+        """
+        endpoints = sorted(x for iv in intervals for x in (iv[0], iv[1] - 1))
+        center = endpoints[len(endpoints) // 2]
+        here, left, right = [], [], []
+        for iv in intervals:
+            if iv[1] <= center:
+                left.append(iv)
+            elif iv[0] > center:
+                right.append(iv)
+            else:
+                here.append(iv)
+        self.center = center
+        self.by_begin = sorted(here, key=lambda iv: iv[0])
+        self.by_end = sorted(here, key=lambda iv: iv[1], reverse=True)
+        self.left = _Node(left) if left else None
+        self.right = _Node(right) if right else None
+
+
+class ActivityIndex:
+    """
+    An index answering which reminders are active (shown) at a given time, in
+    O(log n + k) for n intervals and k results.
+
+    Only "periods" models are indexed, by their time-interval periods (see
+    `ActTimeModel.active_intervals()`). Times are in the 2-day range 0 - 2879 minutes.
+    """
+
+    def __init__(self):
+        self._intervals = {}  # {reminder_id: [(begin, end), ...]}
+        self._root = None
+        self._dirty = False
+
+    @classmethod
+    def from_reminders(cls, reminders):
+        """
+        Args:
+            reminders: An iterable of Reminder objects.
+        """
+        index = cls()
+        for rem in reminders:
+            index.add(rem.id, rem.act_time_model)
+        return index
+
+    def add(self, reminder_id: int, act_time_model):
+        """
+        Add (or replace) the intervals of a reminder.
+
+        Args:
+            reminder_id: Reminder ID.
+            act_time_model (ActTimeModel): The model of the reminder.
+        """
+        intervals = act_time_model.active_intervals() if act_time_model else []
+        if intervals:
+            self._intervals[reminder_id] = intervals
+        else:
+            self._intervals.pop(reminder_id, None)
+        self._dirty = True
+
+    def remove(self, reminder_id: int):
+        if self._intervals.pop(reminder_id, None) is not None:
+            self._dirty = True
+
+    def __len__(self):
+        """
+        Returns:
+            Number of indexed reminders.
+        """
+        return len(self._intervals)
+
+    def _get_root(self):
+        """
+        Returns the root of the interval tree, (re)building it if the index has been
+        changed since it was built.
+        """
+        if self._dirty:
+            intervals = [(begin, end, rid) for rid, ivs in self._intervals.items()
+                         for begin, end in ivs]
+            self._root = _Node(intervals) if intervals else None
+            self._dirty = False
+        return self._root
+
+    def active_at(self, t):
+        """
+        Args:
+            t: An HrMin, or int in minutes.
+
+        Returns:
+            set: IDs of the reminders active at time `t`.
+        """
+        t = t.to_minutes() if isinstance(t, HrMin) else t
+        result = set()
+        node = self._get_root()
+        while node is not None:
+            if t < node.center:
+                for begin, _, rid in node.by_begin:
+                    if begin > t:
+                        break
+                    result.add(rid)
+                node = node.left
+            elif t > node.center:
+                for _, end, rid in node.by_end:
+                    if end <= t:
+                        break
+                    result.add(rid)
+                node = node.right
+            else:
+                result.update(iv[2] for iv in node.by_begin)
+                break
+        return result
+
+    def active_between(self, a, b):
+        """
+        Args:
+            a: Start time, an HrMin or int in minutes.
+            b: End time (exclusive), an HrMin or int in minutes.
+
+        Returns:
+            set: IDs of the reminders active at some time in [a, b).
+        """
+        a = a.to_minutes() if isinstance(a, HrMin) else a
+        b = b.to_minutes() if isinstance(b, HrMin) else b
+        result = set()
+        if a >= b:
+            return result
+        stack = [self._get_root()]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if b <= node.center:
+                for begin, _, rid in node.by_begin:
+                    if begin >= b:
+                        break
+                    result.add(rid)
+                stack.append(node.left)
+            elif a > node.center:
+                for _, end, rid in node.by_end:
+                    if end <= a:
+                        break
+                    result.add(rid)
+                stack.append(node.right)
+            else:
+                result.update(iv[2] for iv in node.by_begin)
+                stack.append(node.left)
+                stack.append(node.right)
+        return result
@@ -0,0 +1,114 @@
+"""
+Benchmark of ActTimeModel.to_json() / ActTimeModel.from_json() throughput, over a mix
+of "moments", "periods" and "moments during periods" models.
+
+Usage:
+    python benchmarks/act_time_model_json.py [--count N] [--repeat R] [--json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hrmin import HrMin
+from moment import Moment
+from period import Period
+from act_time_model import ActTimeModel
+
+
+def random_moment(rng):
+    r = rng.randrange(4)
+    if r == 0:
+        return Moment.scene_moment(rng.randint(1, 20))
+    elif r == 1:
+        return Moment.hrmin_moment(hrmin=HrMin.from_minutes(rng.randrange(2880)))
+    elif r == 2:
+        return Moment.occasion_start_moment(rng.randint(1, 20))
+    else:
+        return Moment.occasion_end_moment(rng.randint(1, 20))
+
+
+def random_period(rng):
+    r = rng.randrange(5)
+    span = HrMin.from_minutes(rng.randint(1, 180))
+    if r == 0:
+        start = HrMin.from_minutes(rng.randrange(2880 - 181))
+        return Period.hrmin_interval_period(start, span_hrmin=span)
+    elif r == 1:
+        return Period.occasion_period(rng.randint(1, 20))
+    elif r == 2:
+        return Period.scene_extended_period(rng.randint(1, 20), span)
+    elif r == 3:
+        return Period.occasion_start_extended_period(rng.randint(1, 20), span)
+    else:
+        return Period.occasion_end_extended_period(rng.randint(1, 20), span)
+
+
+def random_model(rng):
+    """
+    Returns:
+        An ActTimeModel of random type, with 1 - 4 moments/periods.
+    """
+    r = rng.randrange(3)
+    n = rng.randint(1, 4)
+    if r == 0:
+        return ActTimeModel.moments_model([random_moment(rng) for _ in range(n)])
+    elif r == 1:
+        return ActTimeModel.periods_model([random_period(rng) for _ in range(n)])
+    else:
+        mps = [((rng.randrange(60), rng.randint(5, 60)) if rng.random() < 0.5
+                else random_moment(rng),
+                random_period(rng))
+               for _ in range(n)]
+        return ActTimeModel.moments_during_periods_model(mps)
+
+
+def run(count, repeat, seed=0):
+    """
+    Returns:
+        dict: best-of-`repeat` encode/decode times and throughputs.
+    """
+    rng = random.Random(seed)
+    models = [random_model(rng) for _ in range(count)]
+
+    encode_s = decode_s = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        encoded = [m.to_json() for m in models]
+        t1 = time.perf_counter()
+        decoded = [ActTimeModel.from_json(j) for j in encoded]
+        t2 = time.perf_counter()
+        encode_s = min(encode_s, t1 - t0)
+        decode_s = min(decode_s, t2 - t1)
+    assert [m.to_json() for m in decoded] == encoded
+
+    return {'count': count,
+            'encode_s': encode_s, 'encode_per_s': count / encode_s,
+            'decode_s': decode_s, 'decode_per_s': count / decode_s,
+            'mean_json_bytes': sum(len(j) for j in encoded) / count}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    r = run(args.count, args.repeat)
+    if args.json:
+        print(json.dumps(r, indent=2))
+    else:
+        print('{} models, {:.1f} bytes/model'.format(r['count'], r['mean_json_bytes']))
+        print('encode: {:.3f} s ({:,.0f} models/s)'.format(r['encode_s'], r['encode_per_s']))
+        print('decode: {:.3f} s ({:,.0f} models/s)'.format(r['decode_s'], r['decode_per_s']))
+
+
+if __name__ == '__main__':
+    main()
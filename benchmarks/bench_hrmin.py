@@ -0,0 +1,70 @@
+"""
+Micro-benchmark of HrMin construction, comparison, hashing and arithmetic.
+
+Usage:
+    python benchmarks/bench_hrmin.py [--number N] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hrmin import HrMin
+
+_SETUP = '''
+from hrmin import HrMin
+a = HrMin(7, 30)
+b = HrMin(23, 5)
+values = [HrMin.from_minutes(m) for m in range(0, 2880, 7)]
+'''
+
+CASES = {
+    'construct HrMin(hr, mn)': 'HrMin(7, 30)',
+    'construct from_minutes': 'HrMin.from_minutes(1234)',
+    'compare a < b': 'a < b',
+    'compare a == b': 'a == b',
+    'hash': 'hash(a)',
+    'add a + b': 'a + b',
+    'add a + int': 'a + 15',
+    'sub a - b': 'b - a',
+    'to_minutes': 'a.to_minutes()',
+    'hr, mn': 'a.hr, a.mn',
+    'sort 412 values': 'sorted(values, reverse=True)',
+    'set of 412 values': 'set(values)',
+}
+
+
+def run(number):
+    """
+    Returns:
+        dict: {case: nanoseconds per operation}, best of 5 runs.
+    """
+    results = {}
+    for name, stmt in CASES.items():
+        t = min(timeit.repeat(stmt, setup=_SETUP, number=number, repeat=5))
+        results[name] = t / number * 1e9
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=100000)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    assert HrMin.from_minutes(450) is HrMin(7, 30)
+    results = run(args.number)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, ns in results.items():
+            print('{:<26} {:10.1f} ns'.format(name, ns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+Benchmark suite of data access, model encoding/decoding and the run-time structures,
+over synthetic databases.
+
+For each size, a temporary SQLite database is generated with that many reminders (a mix
+of "moments", "periods" and "moments during periods" models over 20 scenes, 20 occasions
+and 10 categories), and the operations below are timed through data_access:
+  add_reminder, add_reminders, update_reminder, read_reminder_table (requires pandas),
+  iter_reminder_table, load_reminders, name lookups, fire_scene, read_agenda,
+  to_json/from_json, and ActivityIndex/Scheduler construction and queries.
+
+Results are written as JSON (see `--output`), so that runs on different commits can be
+compared with `--compare`. Sizes of 10^6 take several minutes.
+
+Usage:
+    python benchmarks/run.py [--sizes 1000 10000 ...] [--seed S] [--output FILE]
+                             [--compare BASELINE_FILE]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dataaccess._db_access as db
+from dataaccess import data_access
+from act_time_model import ActTimeModel
+from activity_index import ActivityIndex
+from reminder import Reminder
+from scheduler import Scheduler
+from act_time_model_json import random_model
+
+# The base tables (created by 10.create_tables.ipynb for the real database).
+_BASE_SCHEMA = """
+CREATE TABLE category (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE scene (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE occasion (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE reminder (id INTEGER PRIMARY KEY, category_id INTEGER, content TEXT,
+                       act_time_model TEXT);
+"""
+
+N_CATEGORIES = 10
+N_SCENES = 20
+N_OCCASIONS = 20
+
+
+def generate_database(path, size, rng):
+    """
+    Create a database file with `size` random reminders, inserted directly (without
+    data_access).
+    """
+    conn = sqlite3.connect(path)
+    conn.executescript(_BASE_SCHEMA)
+    conn.executemany("INSERT INTO category (id, name) VALUES (?,?);",
+                     [(i, 'category {}'.format(i)) for i in range(1, N_CATEGORIES + 1)])
+    conn.executemany("INSERT INTO scene (id, name) VALUES (?,?);",
+                     [(i, 'scene {}'.format(i)) for i in range(1, N_SCENES + 1)])
+    conn.executemany("INSERT INTO occasion (id, name) VALUES (?,?);",
+                     [(i, 'occasion {}'.format(i)) for i in range(1, N_OCCASIONS + 1)])
+    conn.executemany("INSERT INTO reminder (id, category_id, content, act_time_model) "
+                     "VALUES (?,?,?,?);",
+                     ((i, rng.randint(1, N_CATEGORIES), random_content(rng),
+                       random_model(rng).to_json())
+                      for i in range(1, size + 1)))
+    conn.commit()
+    conn.close()
+
+
+_WORDS = ['量體重', '吃藥', 'water the plants', 'call mom', 'stretch', 'check mail',
+          'backup', 'meeting', 'read', 'walk']
+
+
+def random_content(rng):
+    return ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(1, 4)))
+
+
+def random_reminder(rng):
+    rem = Reminder()
+    rem.category_id = rng.randint(1, N_CATEGORIES)
+    rem.content = random_content(rng)
+    rem.act_time_model = random_model(rng)
+    return rem
+
+
+def timed(func, ops=1):
+    """
+    Returns:
+        dict: 'ops', 'seconds' (total), 'us_per_op'.
+    """
+    t0 = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - t0
+    return {'ops': ops, 'seconds': seconds, 'us_per_op': seconds / ops * 1e6}
+
+
+def run_size(size, seed):
+    """
+    Returns:
+        dict: {case: result of `timed()`, or None if skipped}
+    """
+    rng = random.Random(seed)
+    results = {}
+    tmp_dir = tempfile.mkdtemp(prefix='reminder-bench-')
+    try:
+        path = os.path.join(tmp_dir, 'db.sqlite')
+        results['generate'] = timed(lambda: generate_database(path, size, rng), size)
+
+        db.configure(db_file=path)
+        data_access.clear_name_cache()
+        data_access.clear_model_cache()
+        data_access.clear_identity_map()
+        # first use creates the indexes and auxiliary tables, populating them
+        results['first_use_setup'] = timed(lambda: data_access.get_scene_id('scene 1'),
+                                           size)
+
+        new = [random_reminder(rng) for _ in range(200)]
+        results['add_reminder'] = timed(lambda: [data_access.add_reminder(r) for r in new],
+                                        len(new))
+        batch = [random_reminder(rng) for _ in range(1000)]
+        results['add_reminders'] = timed(lambda: data_access.add_reminders(batch),
+                                         len(batch))
+
+        ids = rng.sample(range(1, size + 1), min(1000, size))
+        to_update = data_access.load_reminders(ids[:200])
+        for rem in to_update:
+            rem.act_time_model = random_model(rng)
+        results['update_reminder'] = timed(
+            lambda: [data_access.update_reminder(r) for r in to_update], len(to_update))
+        del to_update
+
+        try:
+            import pandas  # noqa: F401
+        except ImportError:
+            results['read_reminder_table'] = None
+        else:
+            results['read_reminder_table'] = timed(data_access.read_reminder_table, size)
+        results['iter_reminder_table'] = timed(
+            lambda: sum(1 for _ in data_access.iter_reminder_table()), size)
+
+        data_access.clear_identity_map()
+        results['load_reminders'] = timed(lambda: data_access.load_reminders(ids),
+                                          len(ids))
+
+        names = ['scene {}'.format(rng.randint(1, N_SCENES)) for _ in range(10000)]
+        results['get_scene_id'] = timed(
+            lambda: [data_access.get_scene_id(n) for n in names], len(names))
+        category_ids = [rng.randint(1, N_CATEGORIES) for _ in range(10000)]
+        results['get_category_name'] = timed(
+            lambda: [data_access.get_category_name(i) for i in category_ids],
+            len(category_ids))
+
+        scene_ids = [rng.randint(1, N_SCENES) for _ in range(1000)]
+        results['fire_scene'] = timed(
+            lambda: [data_access.fire_scene(i) for i in scene_ids], len(scene_ids))
+        minutes = [rng.randrange(2880) for _ in range(200)]
+        results['read_agenda_minute'] = timed(
+            lambda: [data_access.read_agenda(m, m + 1) for m in minutes], len(minutes))
+
+        models = [random_model(rng) for _ in range(10000)]
+        results['to_json'] = timed(lambda: [m.to_json() for m in models], len(models))
+        encoded = [m.to_json() for m in models]
+        results['from_json'] = timed(lambda: [ActTimeModel.from_json(j) for j in encoded],
+                                     len(encoded))
+        results['decode_act_time_model_cached'] = timed(
+            lambda: [data_access.decode_act_time_model(i, model_json) for i, model_json
+                     in data_access.iter_reminder_table(['id', 'act_time_model'])],
+            size)
+
+        reminders = data_access.load_reminders()
+        index = None
+
+        def build_index():
+            nonlocal index
+            index = ActivityIndex.from_reminders(reminders)
+            index.active_at(0)  # built lazily
+
+        results['activity_index_build'] = timed(build_index, len(reminders))
+        results['active_at'] = timed(lambda: [index.active_at(m) for m in minutes * 5],
+                                     len(minutes) * 5)
+
+        scheduler = None
+
+        def build_scheduler():
+            nonlocal scheduler
+            scheduler = Scheduler.from_reminders(reminders)
+
+        results['scheduler_build'] = timed(build_scheduler, len(reminders))
+        results['scheduler_advance_day'] = timed(
+            lambda: [scheduler.advance(m) for m in range(2880)], 2880)
+    finally:
+        db.close()
+        data_access.clear_name_cache()
+        data_access.clear_model_cache()
+        data_access.clear_identity_map()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """
+    Print the ratio of the time per operation of `results` to that of `baseline`.
+    """
+    print('{:>8}  {:<30} {:>12} {:>12} {:>7}'.format('size', 'case', 'baseline us',
+                                                     'us', 'ratio'))
+    for size, cases in results['results'].items():
+        for case, r in cases.items():
+            b = baseline['results'].get(size, {}).get(case)
+            if r is None or b is None:
+                continue
+            print('{:>8}  {:<30} {:12.2f} {:12.2f} {:7.2f}'.format(
+                size, case, b['us_per_op'], r['us_per_op'],
+                r['us_per_op'] / b['us_per_op']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE_FILE',
+                        help='compare with the JSON results of a previous run')
+    args = parser.parse_args()
+
+    results = {'meta': {'commit': _git_commit(),
+                        'python': platform.python_version(),
+                        'sqlite': sqlite3.sqlite_version,
+                        'platform': platform.platform(),
+                        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                        'seed': args.seed},
+               'results': {}}
+    for size in args.sizes:
+        print('size {}...'.format(size), file=sys.stderr)
+        results['results'][str(size)] = run_size(size, args.seed)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    elif not args.output:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Startup benchmark: measures the import time and the resident memory of importing the
+`dataaccess` package and the model modules, each in a fresh interpreter.
+
+It fails (exit status 1) if any of the modules pulls in a heavy optional dependency
+(pandas, SQLAlchemy, NumPy) at import time, or if the median import time or the RSS
+growth exceeds the given budget.
+
+Usage:
+    python benchmarks/startup.py [--repeat N] [--max-ms MS] [--max-rss-mb MB] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['dataaccess', 'dataaccess.data_access',
+           'hrmin', 'moment', 'period', 'act_time_model', 'reminder']
+HEAVY_MODULES = ['pandas', 'sqlalchemy', 'numpy']
+
+# Runs in a fresh interpreter. Prints [import seconds, RSS growth in KiB, heavy modules].
+_PROBE = '''
+import json, resource, sys, time
+rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+rss1 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps([t1 - t0, rss1 - rss0, [m for m in {heavy!r} if m in sys.modules]]))
+'''
+
+
+def measure(module, repeat):
+    """
+    Returns:
+        dict: median import time (ms), median RSS growth (MiB), heavy modules loaded.
+    """
+    times, rss, heavy = [], [], set()
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', _PROBE.format(module=module,
+                                                                  heavy=HEAVY_MODULES)],
+                             cwd=REPO_DIR, check=True, capture_output=True, text=True)
+        t, r, h = json.loads(out.stdout)
+        times.append(t * 1000)
+        rss.append(r / 1024)
+        heavy.update(h)
+    return {'module': module,
+            'import_ms': statistics.median(times),
+            'rss_mb': statistics.median(rss),
+            'heavy_modules': sorted(heavy)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=50.0,
+                        help='budget of median import time per module')
+    parser.add_argument('--max-rss-mb', type=float, default=10.0,
+                        help='budget of RSS growth per module')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = [measure(m, args.repeat) for m in MODULES]
+    failures = []
+    for r in results:
+        if r['heavy_modules']:
+            failures.append('{} imports {}'.format(r['module'], ', '.join(r['heavy_modules'])))
+        if r['import_ms'] > args.max_ms:
+            failures.append('{} takes {:.1f} ms to import'.format(r['module'], r['import_ms']))
+        if r['rss_mb'] > args.max_rss_mb:
+            failures.append('{} adds {:.1f} MiB RSS'.format(r['module'], r['rss_mb']))
+
+    if args.json:
+        print(json.dumps({'results': results, 'failures': failures}, indent=2))
+    else:
+        for r in results:
+            print('{:<24} {:8.2f} ms {:8.2f} MiB'.format(r['module'], r['import_ms'],
+                                                         r['rss_mb']))
+        for f in failures:
+            print('FAIL: ' + f)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
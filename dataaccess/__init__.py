@@ -4,5 +4,7 @@ as adding/reading/updating/removing a reminder.
 
 modules:
   data_access.py
+  aio.py: coroutine versions of the functions of data_access.py
+  instrumentation.py: statistics of the SQL statements executed
   _db_access.py
 """
\ No newline at end of file
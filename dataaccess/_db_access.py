@@ -2,54 +2,621 @@
 Provides access to database tables.
 """
 
-from sqlalchemy import create_engine
-import pandas as pd
+import functools
+import itertools
 import sqlite3
 import os.path
+import threading
+import time
+import weakref
+from collections import namedtuple
+from contextlib import contextmanager
+
+from dataaccess._lru_cache import LRUCache
 
 _DB_FILE = 'data/db.sqlite'
-_sqlite_conn = None
-_sqlalchemy_engine = None
-# Use sqlite3 and sqlalchemy simultaneously. Will this cause any problem?
+_MAX_VARIABLES = 900  # max number of "?" per statement (kept below SQLite's limit)
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Connection settings, see `configure()`.
+_JOURNAL_MODE = 'WAL'
+_PRAGMAS = {'synchronous': 'NORMAL',
+            'cache_size': -8000,  # negative: in KiB
+            'mmap_size': 0,
+            'busy_timeout': 5000}  # in milliseconds
+
+# All writes go through the single writer connection, serialized by `_writer_lock`.
+# Each thread reads through its own reader connection (`_thread_local.reader`). In WAL mode
+# readers do not block the writer and vice versa.
+_writer_conn = None
+_writer_lock = threading.RLock()
+_thread_local = threading.local()
+_reader_conns = set()  # reader connections open, so that `close()` can close them
+_reader_conns_lock = threading.Lock()
+_pool_generation = 0  # incremented by `close()`; reader connections of older generations
+                      # are discarded
+
+# id_is_rowid: whether the "id" column is an alias of the rowid (INTEGER PRIMARY KEY of a
+# rowid table), so that SQLite assigns it on insert.
+_TableInfo = namedtuple('_TableInfo', ['columns', 'primary_key', 'has_id_column',
+                                       'id_is_rowid'])
+_schema_cache = None  # {table name: _TableInfo}, loaded once per connection pool
+_schema_version = None  # value of "PRAGMA schema_version" when the cache was loaded
+_schema_lock = threading.Lock()
+_transaction_depth = 0  # number of nested `transaction()` scopes currently open
+_transaction_thread = None  # ident of the thread owning the open transaction
+_record_types = {}  # {(table, columns): namedtuple type}, for `Query.as_records()`
+_statement_cache = LRUCache(maxsize=256)  # {structure of a Query: SQL string}
+
+_schema_setups = []  # see `register_schema_setup()`
+_schema_setup_done = False
+_rollback_callbacks = []  # see `register_rollback_callback()`
+_commit_callbacks = []  # see `register_commit_callback()`
+_scope_callbacks = []  # [(depth, on_commit, on_rollback)], see `call_after_commit()` and
+                       # `call_on_rollback()`
+_instrumentation = None  # see `set_instrumentation()`
+
+
+def configure(db_file=None, journal_mode=None, **pragmas):
+    """
+    Change the database file and/or connection settings. Connections already opened are
+    closed, and new connections will be established with the new settings.
+
+    Args:
+        db_file (str): Path of the SQLite database file.
+        journal_mode (str): e.g., 'WAL' (default), 'DELETE'.
+        pragmas: Values of the pragmas 'synchronous', 'cache_size', 'mmap_size' and
+                 'busy_timeout'.
+    """
+    global _DB_FILE, _JOURNAL_MODE
+    for name in pragmas:
+        if name not in _PRAGMAS:
+            raise ValueError('Unknown pragma "{}".'.format(name))
+    with _writer_lock:
+        assert _transaction_depth == 0, 'Cannot configure within a transaction.'
+        close()
+        if db_file is not None:
+            _DB_FILE = db_file
+        if journal_mode is not None:
+            _JOURNAL_MODE = journal_mode
+        _PRAGMAS.update(pragmas)
+
+
+def close():
+    """
+    Close all the connections. New connections will be established on next use.
+    """
+    global _writer_conn, _pool_generation, _schema_setup_done
+    with _writer_lock:
+        assert _transaction_depth == 0, 'Cannot close within a transaction.'
+        if _writer_conn is not None:
+            _writer_conn.close()
+            _writer_conn = None
+        with _reader_conns_lock:
+            for conn in _reader_conns:
+                conn.close()
+            _reader_conns.clear()
+            _pool_generation += 1
+        invalidate_schema_cache()
+        _schema_setup_done = False
+
+
+def _connect(**kwargs):
+    """
+    Open a connection to the database file, with the pragmas applied.
+    """
+    assert os.path.isfile(_DB_FILE)
+    kwargs.setdefault('cached_statements', 256)
+    conn = sqlite3.connect(_DB_FILE, **kwargs)
+    for name, value in _PRAGMAS.items():
+        _execute(conn, "PRAGMA {}={};".format(name, value))
+    return conn
+
+
+def register_schema_setup(func):
+    """
+    Register a function that creates the indexes/tables/triggers it needs (with
+    "IF NOT EXISTS"). The registered functions are called with the writer connection
+    before the first use of the database, all within one transaction, which is committed
+    if they all succeed and rolled back otherwise. They must therefore execute statements
+    with `execute()`, not `executescript()` (which commits).
+
+    Args:
+        func: A callable taking a sqlite3 connection as the only argument.
+    """
+    global _schema_setup_done
+    with _writer_lock:
+        _schema_setups.append(func)
+        _schema_setup_done = False
+
+
+def _ensure_schema_setup():
+    """
+    Call the registered schema setup functions if they have not been called.
+    """
+    global _schema_setup_done
+    if _schema_setup_done:
+        return
+    with _writer_lock:
+        conn = _get_writer_connection()  # runs the setups if establishing the connection
+        if _schema_setup_done or _transaction_depth > 0:
+            return
+        try:
+            _execute(conn, "BEGIN IMMEDIATE;")
+            for func in _schema_setups:
+                func(conn)
+            _commit(conn, notify=False)
+        except BaseException:
+            _rollback(conn)
+            raise
+        finally:
+            invalidate_schema_cache()
+        _schema_setup_done = True
+
+
+def register_commit_callback(func):
+    """
+    Register a function to be called (with no argument) after each commit of changes,
+    i.e., after each write outside `transaction()` scopes, and at the end of each
+    outermost `transaction()` scope. It is called by the committing thread with the
+    writer lock held.
+    """
+    _commit_callbacks.append(func)
+
+
+def register_rollback_callback(func):
+    """
+    Register a function to be called (with no argument) whenever changes are rolled back,
+    e.g., for caches to drop data that are no longer valid.
+    """
+    _rollback_callbacks.append(func)
 
 
-def _get_sqlite_connection():
+def call_after_commit(on_commit, on_rollback=None):
     """
-    Returns the connection, establishing one if none exists.
+    Call `on_commit()` once the changes made so far by the current thread are committed,
+    e.g., to update a cache only with committed data: immediately if not within a
+    `transaction()` scope, otherwise when the outermost scope commits. If the scope in
+    which this is called is rolled back instead, `on_rollback()` is called if given, and
+    `on_commit` is not.
     """
-    global _sqlite_conn
-    if _sqlite_conn is None:
-        assert os.path.isfile(_DB_FILE)
-        _sqlite_conn = sqlite3.connect(_DB_FILE)
-    return _sqlite_conn
+    if _transaction_depth == 0 or _transaction_thread != threading.get_ident():
+        on_commit()
+        return
+    _scope_callbacks.append((_transaction_depth, on_commit, on_rollback))
+
+
+def call_on_rollback(func):
+    """
+    Call `func()` if the `transaction()` scope in which this is called is rolled back
+    (see `call_after_commit()`). Does nothing if not within a `transaction()` scope.
+    """
+    if _transaction_depth > 0 and _transaction_thread == threading.get_ident():
+        _scope_callbacks.append((_transaction_depth, None, func))
+
+
+def in_transaction():
+    """
+    Returns:
+        bool: Whether the current thread is within a `transaction()` scope.
+    """
+    return _transaction_thread == threading.get_ident()
+
+
+def _rollback(conn, savepoint=None):
+    """
+    Roll back the current transaction, or to `savepoint` if given, then call the
+    registered rollback callbacks.
+    """
+    if savepoint is None:
+        conn.rollback()
+        rolled_back = _scope_callbacks[:]
+        _scope_callbacks.clear()
+    else:
+        _execute(conn, "ROLLBACK TO {};".format(savepoint))
+        _execute(conn, "RELEASE {};".format(savepoint))
+        # those registered within the scope rolled back (`_transaction_depth` is already
+        # that of the enclosing scope)
+        rolled_back = [c for c in _scope_callbacks if c[0] > _transaction_depth]
+        _scope_callbacks[:] = [c for c in _scope_callbacks if c[0] <= _transaction_depth]
+    instrumentation = _instrumentation
+    if instrumentation is not None:
+        instrumentation.after_rollback()
+    for _, _, on_rollback in reversed(rolled_back):
+        if on_rollback is not None:
+            on_rollback()
+    for func in _rollback_callbacks:
+        func()
+
+
+def set_instrumentation(instrumentation):
+    """
+    Install an object to be notified of the SQL statements executed, commits and
+    rollbacks (see dataaccess/instrumentation.py), or remove it if None. When none is
+    installed, the only overhead is a check of a global variable per statement.
+
+    The object must have the methods:
+      + before_execute(sql, parameters)
+      + after_execute(sql, parameters, seconds, rowcount, error): `rowcount` is the
+        number of rows modified (-1 for queries); `error` is the exception raised, or
+        None.
+      + after_fetch(sql, rows, seconds): rows fetched by a query.
+      + after_commit(seconds)
+      + after_rollback()
+    """
+    global _instrumentation
+    _instrumentation = instrumentation
+
+
+def _execute(target, sql, parameters=(), many=False):
+    """
+    Execute a statement on a connection or cursor (`executemany()` if `many` is True),
+    notifying the installed instrumentation if any.
+
+    Returns:
+        The cursor.
+    """
+    instrumentation = _instrumentation
+    if instrumentation is None:
+        if many:
+            return target.executemany(sql, parameters)
+        return target.execute(sql, parameters)
+
+    instrumentation.before_execute(sql, parameters)
+    start = time.perf_counter()
+    try:
+        if many:
+            cursor = target.executemany(sql, parameters)
+        else:
+            cursor = target.execute(sql, parameters)
+    except Exception as e:
+        instrumentation.after_execute(sql, parameters, time.perf_counter() - start, -1, e)
+        raise
+    instrumentation.after_execute(sql, parameters, time.perf_counter() - start,
+                                  cursor.rowcount, None)
+    return cursor
+
+
+def _execute_fetchall(sql, parameters=()):
+    """
+    Execute a query on the reader connection and fetch all the result rows.
+    """
+    cursor = _execute(_get_reader_connection().cursor(), sql, parameters)
+    instrumentation = _instrumentation
+    if instrumentation is None:
+        return cursor.fetchall()
+    start = time.perf_counter()
+    rows = cursor.fetchall()
+    instrumentation.after_fetch(sql, len(rows), time.perf_counter() - start)
+    return rows
+
+
+def _commit(conn, notify=True):
+    """
+    Commit, notifying the installed instrumentation if any, then call the functions
+    passed to `call_after_commit()`, and the registered commit callbacks if `notify` is
+    True. The commit callbacks are not called if no transaction is open.
+    """
+    in_transaction = conn.in_transaction
+    if in_transaction:
+        instrumentation = _instrumentation
+        if instrumentation is None:
+            conn.commit()
+        else:
+            start = time.perf_counter()
+            conn.commit()
+            instrumentation.after_commit(time.perf_counter() - start)
+    committed = _scope_callbacks[:]
+    _scope_callbacks.clear()
+    for _, on_commit, _ in committed:
+        if on_commit is not None:
+            on_commit()
+    if notify and in_transaction:
+        for func in _commit_callbacks:
+            func()
 
 
-def _get_sqlalchemy_engine():
+def _get_writer_connection():
     """
-    Returns the engine, establishing one if none exists.
+    Returns the writer connection, establishing one if none exists. Should be called
+    with `_writer_lock` held.
     """
-    global _sqlalchemy_engine
-    if _sqlalchemy_engine is None:
-        assert os.path.isfile(_DB_FILE)
-        _sqlalchemy_engine = create_engine('sqlite:///' + _DB_FILE)
-    return _sqlalchemy_engine
+    global _writer_conn
+    if _writer_conn is None:
+        conn = _connect(check_same_thread=False)
+        _execute(conn, "PRAGMA journal_mode={};".format(_JOURNAL_MODE))
+        _writer_conn = conn
+        _ensure_schema_setup()
+    return _writer_conn
+
+
+def _get_reader_connection():
+    """
+    Returns the reader connection of the current thread, establishing one if none exists.
+    If the current thread owns an open transaction, returns the writer connection instead,
+    so that uncommitted changes are visible.
+    """
+    if _transaction_thread == threading.get_ident():
+        return _writer_conn
+    _ensure_schema_setup()
+    reader = getattr(_thread_local, 'reader', None)
+    if reader is None or reader.generation != _pool_generation:
+        # check_same_thread=False only so that `close()` and `_close_reader()` can
+        # close it
+        conn = _connect(check_same_thread=False)
+        _execute(conn, "PRAGMA query_only=ON;")
+        with _reader_conns_lock:
+            _reader_conns.add(conn)
+        reader = _Reader(conn, _pool_generation)
+        # closes the connection when the thread ends (and its locals are dropped), or
+        # when replaced after `close()`
+        weakref.finalize(reader, _close_reader, conn)
+        _thread_local.reader = reader
+    return reader.conn
+
+
+class _Reader:
+    """
+    The reader connection of a thread, stored in `_thread_local`.
+    """
+
+    __slots__ = ('conn', 'generation', '__weakref__')
+
+    def __init__(self, conn, generation):
+        self.conn = conn
+        self.generation = generation
+
+
+def _close_reader(conn):
+    with _reader_conns_lock:
+        _reader_conns.discard(conn)
+    conn.close()
+
+
+@contextmanager
+def _writing():
+    """
+    A context manager that holds the writer lock and yields the writer connection.
+    On exit, the changes are committed, unless within a `transaction()` scope. On
+    exception, the changes are rolled back, unless within a `transaction()` scope (which
+    will handle the rollback).
+    """
+    with _writer_lock:
+        conn = _get_writer_connection()
+        try:
+            yield conn
+        except BaseException:
+            if _transaction_depth == 0:
+                _rollback(conn)
+            raise
+        if _transaction_depth == 0:
+            _commit(conn)
+
+
+@contextmanager
+def transaction():
+    """
+    A context manager within which the changes made by the functions of this module are
+    committed together when the outermost scope exits, or rolled back altogether if an
+    exception is raised. Nested scopes are implemented with savepoints, so an exception
+    caught inside an outer scope only rolls back the changes of the inner scope.
+
+    The writer connection is held by the current thread for the whole scope. Reads made
+    by this thread within the scope see the uncommitted changes.
+
+    Outside any transaction scope, each function commits its changes immediately.
+
+    Example:
+        with transaction():
+            update_record(...)
+            delete_record(...)
+    """
+    global _transaction_depth, _transaction_thread
+    with _writer_lock:
+        conn = _get_writer_connection()
+        if _transaction_depth == 0:
+            _execute(conn, "BEGIN IMMEDIATE;")
+            _transaction_depth += 1
+            _transaction_thread = threading.get_ident()
+            _check_schema_version()
+            try:
+                yield
+            except BaseException:
+                _transaction_depth -= 1
+                _transaction_thread = None
+                _rollback(conn)
+                raise
+            _transaction_depth -= 1
+            _transaction_thread = None
+            _commit(conn)
+        else:
+            savepoint = 'sp{}'.format(_transaction_depth)
+            _execute(conn, "SAVEPOINT {};".format(savepoint))
+            _transaction_depth += 1
+            try:
+                yield
+            except BaseException:
+                _transaction_depth -= 1
+                _rollback(conn, savepoint)
+                raise
+            _transaction_depth -= 1
+            _execute(conn, "RELEASE {};".format(savepoint))
+            # now part of the enclosing scope
+            _scope_callbacks[:] = [(min(depth, _transaction_depth), on_commit, on_rollback)
+                                   for depth, on_commit, on_rollback in _scope_callbacks]
+
+
+def invalidate_schema_cache():
+    """
+    Drop the cached table metadata. It will be reloaded on next use.
+    Call this after changing the schema by means other than `execute_ddl()`.
+    """
+    global _schema_cache, _schema_version
+    _schema_cache = None
+    _schema_version = None
+
+
+def execute_ddl(sql: str):
+    """
+    Execute DDL statement(s) (CREATE/ALTER/DROP ...) and invalidate the cached table
+    metadata. Cannot be called within a `transaction()` scope, as the statements are
+    committed immediately.
+
+    Args:
+        sql: One or more SQL statements separated by ';'.
+    """
+    with _writer_lock:
+        assert _transaction_depth == 0, 'Cannot execute DDL within a transaction.'
+        conn = _get_writer_connection()
+        try:
+            conn.executescript(sql)
+        finally:
+            invalidate_schema_cache()
+
+
+def _load_schema_cache():
+    """
+    Load the names, columns and primary keys of all tables into the cache.
+
+    Returns:
+        The loaded cache.
+    """
+    global _schema_cache, _schema_version
+    cursor = _get_reader_connection().cursor()
+    _execute(cursor, "PRAGMA schema_version;")
+    version = cursor.fetchone()[0]
+    _execute(cursor, "SELECT name, sql FROM sqlite_master WHERE type='table';")
+    tables = cursor.fetchall()
+
+    cache = {}
+    for table, table_sql in tables:
+        _execute(cursor, 'PRAGMA table_info("{}");'.format(table))
+        # rows: (cid, name, type, notnull, dflt_value, pk)
+        rows = cursor.fetchall()
+        columns = tuple(r[1] for r in rows)
+        primary_key = tuple(r[1] for r in sorted((r for r in rows if r[5] > 0),
+                                                  key=lambda r: r[5]))
+        id_is_rowid = primary_key == ('id',) \
+            and any(r[1] == 'id' and r[2].upper() == 'INTEGER' for r in rows) \
+            and 'WITHOUT ROWID' not in (table_sql or '').upper()
+        cache[table] = _TableInfo(columns, primary_key, 'id' in columns, id_is_rowid)
+    _schema_cache = cache
+    _schema_version = version
+    return cache
+
+
+def _check_schema_version():
+    """
+    Drop the cached table metadata if the schema has been changed (by any connection,
+    including other processes) since it was loaded.
+
+    Returns:
+        bool: Whether the cache has been dropped.
+    """
+    cursor = _get_reader_connection().cursor()
+    _execute(cursor, "PRAGMA schema_version;")
+    if cursor.fetchone()[0] == _schema_version:
+        return False
+    invalidate_schema_cache()
+    return True
+
+
+def _get_table_info(table):
+    """
+    Returns the cached metadata of `table`. Raise an exception if `table` does not exist.
+
+    No query is made if `table` is in the cache. The schema version is checked when
+    `table` is not in the cache, at the start of each `transaction()` scope, and when a
+    statement fails because of a missing table or column (see `_retry_on_schema_change`),
+    so that the cache is reloaded after the schema has been changed.
+
+    Returns:
+        _TableInfo
+    """
+    info = _get_schema_cache().get(table)
+    if info is None and _check_schema_version():  # the table may have been created
+        info = _get_schema_cache().get(table)
+    if info is None:
+        raise RuntimeError('Table "{}" does not exist.'.format(table))
+    return info
+
+
+def _get_schema_cache():
+    cache = _schema_cache
+    if cache is None:
+        with _schema_lock:
+            cache = _schema_cache or _load_schema_cache()
+    return cache
+
+
+_SCHEMA_ERRORS = ('no such table', 'no such column', 'has no column named')
+
+
+def _schema_changed_by(error):
+    """
+    Returns:
+        bool: Whether `error`, an exception raised by a statement, is caused by a missing
+              table or column and the schema has changed since the cached metadata was
+              loaded, in which case the cache has been dropped.
+    """
+    return isinstance(error, sqlite3.OperationalError) \
+        and any(s in str(error) for s in _SCHEMA_ERRORS) and _check_schema_version()
+
+
+def _retry_on_schema_change(func):
+    """
+    Decorator: if `func` fails because the schema has changed since the cached metadata
+    was loaded (see `_schema_changed_by()`), call it once more with the metadata
+    reloaded.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if not _schema_changed_by(e):
+                raise
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def table_exists(table):
+    """
+    Returns:
+        bool: Whether `table` exists.
+    """
+    try:
+        _get_table_info(table)
+    except RuntimeError:
+        return False
+    return True
 
 
 def _check_table_exists(table):
     """
     Check that `table` exists. If not, raise an exception.
     """
-    conn = _get_sqlite_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?;", (table,))
-    if cursor.fetchone() is None:
-        raise RuntimeError('Table "{}" does not exist.'.format(table))
+    _get_table_info(table)
+
+
+def _has_id_column(table):
+    """
+    Returns:
+        bool: Whether `table` has an "id" column.
+    """
+    return _get_table_info(table).has_id_column
 
 
+@_retry_on_schema_change
 def add_record(table: str, column_value: dict):
     """
     Add a record to the table.
 
+    If the "id" column is an INTEGER PRIMARY KEY, the ID is assigned by SQLite. Otherwise,
+    it is computed as MAX(id) + 1 in the INSERT statement itself. Either way, the ID is
+    allocated atomically under SQLite's write lock, so that concurrent writers (including
+    other processes) do not collide.
+
     Args:
         table: Table name
         column_value: A dictionary (column: value), without 'id' key.
@@ -58,43 +625,111 @@ def add_record(table: str, column_value: dict):
         If the table has "id" column, returns the ID of the newly added record.
         Otherwise, returns None.
     """
-    _check_table_exists(table)
-
-    conn = _get_sqlite_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT * FROM {} LIMIT 1;".format(table))
-    has_id_column = 'id' in (t[0] for t in cursor.description)
-
+    info = _get_table_info(table)
     assert 'id' not in column_value
-    new_id = None
-    if has_id_column:
-        cursor.execute("SELECT MAX(id) FROM {};".format(table))
-        r = cursor.fetchone()
-        assert r is not None
-        if r[0] is not None:
-            new_id = r[0] + 1
-        else:
-            new_id = 1
 
     columns = ','.join(column_value.keys())
     placeholders = ','.join(['?'] * len(column_value))
     values = list(column_value.values())
-    if has_id_column:
-        columns = 'id,' + columns
-        placeholders = '?,' + placeholders
-        values = [new_id] + values
-    try:
-        cursor.execute("INSERT INTO {} ({}) VALUES ({});".format(table, columns, placeholders),
-                       values)
-    except sqlite3.IntegrityError as e:
-        raise sqlite3.IntegrityError('Inserting into table "{}" with record {}.'
-                                     .format(table, column_value)) from e
-    conn.commit()
+    if info.has_id_column and not info.id_is_rowid:
+        sql = "INSERT INTO {0} (id{1}) SELECT COALESCE(MAX(id), 0) + 1{2} FROM {0}".format(
+            table, ',' + columns if columns else '', ',' + placeholders if columns else '')
+        if _HAS_RETURNING:
+            sql += " RETURNING id"
+    elif columns:
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(table, columns, placeholders)
+    else:
+        sql = "INSERT INTO {} DEFAULT VALUES".format(table)
+
+    with _writing() as conn:
+        cursor = conn.cursor()
+        try:
+            _execute(cursor, sql, values)
+        except sqlite3.IntegrityError as e:
+            raise sqlite3.IntegrityError('Inserting into table "{}" with record {}.'
+                                         .format(table, column_value)) from e
+        if not info.has_id_column:
+            return None
+        if info.id_is_rowid:
+            return cursor.lastrowid
+        if _HAS_RETURNING:
+            return cursor.fetchone()[0]
+        _execute(cursor, "SELECT id FROM {} WHERE rowid=?;".format(table),
+                 [cursor.lastrowid])
+        return cursor.fetchone()[0]
+
+
+def reserve_ids(table: str, count: int):
+    """
+    Reserve a range of IDs of `table` for records to be inserted in the current
+    transaction. As `transaction()` holds the write lock of the database from its start,
+    no other writer can take these IDs before the transaction ends.
+
+    Must be called in a `transaction()` scope.
+
+    Args:
+        table: Table name. The table must have an "id" column.
+        count: Number of IDs.
+
+    Returns:
+        range: The reserved IDs.
+    """
+    assert _transaction_depth > 0 and _transaction_thread == threading.get_ident(), \
+        'reserve_ids() must be called in a transaction.'
+    assert _has_id_column(table)
+    cursor = _get_writer_connection().cursor()
+    _execute(cursor, "SELECT COALESCE(MAX(id), 0) + 1 FROM {};".format(table))
+    first_id = cursor.fetchone()[0]
+    return range(first_id, first_id + count)
+
+
+@_retry_on_schema_change
+def add_records(table: str, rows: list):
+    """
+    Add multiple records to the table in a single transaction. The IDs are reserved with
+    `reserve_ids()` and inserted explicitly, so that one statement is executed per record.
+
+    Args:
+        table: Table name
+        rows: A list of dictionaries (column: value), without 'id' key. All the
+              dictionaries must have the same keys.
+
+    Returns:
+        If the table has "id" column, returns a list of the IDs of the newly added
+        records, in the order of `rows`. Otherwise, returns None.
+    """
+    has_id_column = _get_table_info(table).has_id_column
+    if len(rows) == 0:
+        return [] if has_id_column else None
+
+    column_names = list(rows[0].keys())
+    assert 'id' not in column_names
+    for column_value in rows:
+        assert column_value.keys() == rows[0].keys(), \
+            'All records must have the same columns.'
+
+    new_ids = None
+    columns = ','.join(column_names)
+    placeholders = ','.join(['?'] * len(column_names))
+    values = [[column_value[col] for col in column_names] for column_value in rows]
+    with transaction():
+        if has_id_column:
+            new_ids = list(reserve_ids(table, len(rows)))
+            columns = 'id,' + columns if columns else 'id'
+            placeholders = '?,' + placeholders if placeholders else '?'
+            values = [[new_id] + v for new_id, v in zip(new_ids, values)]
+        try:
+            _execute(_get_writer_connection(),
+                     "INSERT INTO {} ({}) VALUES ({});".format(table, columns, placeholders),
+                     values, many=True)
+        except sqlite3.IntegrityError as e:
+            raise sqlite3.IntegrityError('Inserting {} records into table "{}".'
+                                         .format(len(rows), table)) from e
 
-    return new_id
+    return new_ids
 
 
+@_retry_on_schema_change
 def update_record(table: str, column_value: dict):
     """
     Update a record in the table. The table must have a 'id' field.
@@ -103,20 +738,22 @@ def update_record(table: str, column_value: dict):
     Args:
         table: Table name.
         column_value: A dictionary of column-value pairs. Must include 'id' key.
+
+    Returns:
+        int: Number of records updated, 0 if no record has the id.
     """
     assert 'id' in column_value
     _check_table_exists(table)
 
-    conn = _get_sqlite_connection()
-    cursor = conn.cursor()
     sql = ("UPDATE {} SET "
            + ','.join([col + '=?' for col in column_value.keys() if col != 'id'])
            + " WHERE id=?;").format(table)
     parameters = [v for col, v in column_value.items() if col != 'id'] + [column_value['id']]
-    cursor.execute(sql, parameters)
-    conn.commit()
+    with _writing() as conn:
+        return _execute(conn, sql, parameters).rowcount
 
 
+@_retry_on_schema_change
 def delete_record(table: str, record_id: int):
     """
     Delete the record with id = `record_id` from the table `table`.
@@ -126,10 +763,310 @@ def delete_record(table: str, record_id: int):
     """
     _check_table_exists(table)
 
-    conn = _get_sqlite_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM {} WHERE id=?".format(table), (record_id,))
-    conn.commit()
+    with _writing() as conn:
+        _execute(conn, "DELETE FROM {} WHERE id=?".format(table), (record_id,))
+
+
+@_retry_on_schema_change
+def delete_where_equal(table: str, column_value: dict):
+    """
+    Delete the records satisfying the WHERE condition from the table `table`.
+
+    Args:
+        table: Table name.
+        column_value: A non-empty dictionary (column: value) to be used as WHERE condition.
+
+    Returns:
+        int: Number of records deleted.
+    """
+    assert len(column_value) > 0
+    _check_table_exists(table)
+
+    sql = "DELETE FROM {} WHERE ".format(table) \
+          + " AND ".join("{}=?".format(c) for c in column_value.keys())
+    with _writing() as conn:
+        return _execute(conn, sql, list(column_value.values())).rowcount
+
+
+class Query:
+    """
+    A SELECT query on one table, built by chaining the methods below, e.g.,
+
+        Query('reminder', ['id', 'content']).where_in('id', ids).order_by('id').all()
+
+    The SQL strings generated are kept in a statement cache (and the statements prepared
+    by sqlite3 are reused through its own cache of the same strings). To make long IN
+    lists reuse a few statements, the number of "?" of an IN list is rounded up to a
+    power of 2, padded by repeating the last value. IN lists exceeding the variable limit
+    are split into several statements; if the query is ordered or limited, the results
+    of these statements are merged in Python.
+    """
+
+    def __init__(self, table: str, columns=None):
+        """
+        Args:
+            table: Table name.
+            columns (list): Column names to be queried. If None, all the columns.
+        """
+        self._info = _get_table_info(table)
+        self._table = table
+        self._all_columns = columns is None
+        if columns is None:
+            self._columns = self._info.columns
+        else:
+            self._columns = tuple(self._check_column(c) for c in columns)
+            assert len(self._columns) > 0
+        self._conditions = []  # [(operator, column, value), ...]
+        self._in = None  # (column, list of values)
+        self._order = []  # [(column, descending), ...]
+        self._limit = None
+        self._offset = 0
+        self._record_type = None
+
+    def _check_column(self, column):
+        if column not in self._info.columns and _check_schema_version():
+            self._reload_info()  # the column may have been added
+        if column not in self._info.columns:
+            raise RuntimeError('Table "{}" has no column "{}".'.format(self._table, column))
+        return column
+
+    def _reload_info(self):
+        self._info = _get_table_info(self._table)
+        if self._all_columns:
+            self._columns = self._info.columns
+
+    def _retrying(self, func):
+        """
+        Call `func()`, then once more with the table metadata reloaded if it fails because
+        the schema has changed (see `_schema_changed_by()`).
+        """
+        try:
+            return func()
+        except sqlite3.OperationalError as e:
+            if not _schema_changed_by(e):
+                raise
+        self._reload_info()
+        return func()
+
+    def where_equal(self, column_value: dict):
+        """
+        Add the conditions `column` = `value` for each item of `column_value`.
+        """
+        for column, value in column_value.items():
+            self._conditions.append(('=', self._check_column(column), value))
+        return self
+
+    def where_in(self, column: str, values):
+        """
+        Add the condition `column` IN `values`. Only one IN condition is supported.
+        """
+        assert self._in is None, 'Only one IN condition is supported.'
+        self._in = (self._check_column(column), list(values))
+        return self
+
+    def where_range(self, column: str, begin=None, end=None):
+        """
+        Add the condition `begin` <= `column` < `end`. A bound of None is not applied.
+        """
+        self._check_column(column)
+        if begin is not None:
+            self._conditions.append(('>=', column, begin))
+        if end is not None:
+            self._conditions.append(('<', column, end))
+        return self
+
+    def order_by(self, column: str, descending=False):
+        """
+        Order by `column` (after the columns given in previous calls).
+        """
+        self._order.append((self._check_column(column), descending))
+        return self
+
+    def limit(self, limit: int, offset=0):
+        self._limit = limit
+        self._offset = offset
+        return self
+
+    def as_records(self):
+        """
+        Make the query return namedtuples with the columns as fields, instead of plain
+        tuples.
+        """
+        key = (self._table, self._columns)
+        record_type = _record_types.get(key)
+        if record_type is None:
+            record_type = namedtuple(self._table, self._columns, rename=True)
+            _record_types[key] = record_type
+        self._record_type = record_type
+        return self
+
+    def all(self):
+        """
+        Returns:
+            (list) All the result rows.
+        """
+        return self._retrying(lambda: list(self.iter()))
+
+    def first(self):
+        """
+        Returns:
+            The first result row, or None.
+        """
+        return self._retrying(lambda: next(self.iter(chunk_size=1), None))
+
+    def iter(self, chunk_size=1000):
+        """
+        Iterate over the result rows, fetching `chunk_size` rows at a time.
+        """
+        rows = self._execute(self._columns, self._conditions, self._order, self._limit,
+                             self._offset, chunk_size)
+        if self._record_type is None:
+            return rows
+        return map(self._record_type._make, rows)
+
+    def pages(self, page_size: int, key='id'):
+        """
+        Keyset pagination: iterate over the result in pages ordered by `key`, which must
+        be unique and not NULL. Each page is queried with "`key` > (last key of the
+        previous page)", so that the cost of a page does not depend on its position.
+        Cannot be combined with `order_by()` or `limit()`.
+
+        Yields:
+            A list of at most `page_size` rows.
+        """
+        assert not self._order and self._limit is None
+        assert page_size > 0
+        self._check_column(key)
+        columns = self._columns
+        selected = columns if key in columns else columns + (key,)
+        key_index = selected.index(key)
+        conditions = self._conditions
+        while True:
+            rows = list(self._execute(selected, conditions, [(key, False)], page_size, 0,
+                                      page_size))
+            if not rows:
+                return
+            last_key = rows[-1][key_index]
+            if len(selected) > len(columns):
+                rows = [r[:len(columns)] for r in rows]
+            if self._record_type is not None:
+                rows = [self._record_type._make(r) for r in rows]
+            yield rows
+            if len(rows) < page_size:
+                return
+            conditions = self._conditions + [('>', key, last_key)]
+
+    def _execute(self, columns, conditions, order, limit, offset, chunk_size):
+        """
+        Returns:
+            An iterator over the result rows, as tuples of values of `columns`.
+        """
+        if self._in is None:
+            sql = self._statement(columns, conditions, 0, order, limit is not None)
+            parameters = [v for _, _, v in conditions]
+            if limit is not None:
+                parameters.extend([limit, offset])
+            return _fetch(sql, parameters, chunk_size)
+
+        values = self._in[1]
+        if not values:
+            return iter(())
+        max_in = _MAX_VARIABLES - len(conditions) - 2
+        if len(values) <= max_in:
+            chunks = [values]
+        else:
+            chunks = [values[i:i + max_in] for i in range(0, len(values), max_in)]
+
+        if len(chunks) == 1 or (not order and limit is None and not offset):
+            return itertools.chain.from_iterable(
+                self._execute_in(columns, conditions, chunk, order, limit, offset,
+                                 chunk_size)
+                for chunk in chunks)
+
+        # Merge the results of the chunks in Python. Each chunk only needs its first
+        # (offset + limit) rows. The order columns are queried as well, for sorting.
+        selected = columns + tuple(c for c, _ in order)
+        chunk_limit = None if limit is None else offset + limit
+        rows = []
+        for chunk in chunks:
+            rows.extend(self._execute_in(selected, conditions, chunk, order, chunk_limit, 0,
+                                         chunk_size))
+        for i in reversed(range(len(order))):
+            index = len(columns) + i
+            rows.sort(key=lambda r: (r[index] is not None, r[index]),  # NULLs first
+                      reverse=order[i][1])
+        end = None if limit is None else offset + limit
+        return (r[:len(columns)] for r in rows[offset:end])
+
+    def _execute_in(self, columns, conditions, values, order, limit, offset, chunk_size):
+        size = 1 << (len(values) - 1).bit_length()
+        size = min(size, _MAX_VARIABLES - len(conditions) - 2)
+        parameters = [v for _, _, v in conditions]
+        parameters.extend(values)
+        parameters.extend([values[-1]] * (size - len(values)))
+        sql = self._statement(columns, conditions, size, order, limit is not None)
+        if limit is not None:
+            parameters.extend([limit, offset])
+        return _fetch(sql, parameters, chunk_size)
+
+    def _statement(self, columns, conditions, in_size, order, limited):
+        key = (self._table, columns, tuple((op, c) for op, c, _ in conditions),
+               self._in[0] if in_size else None, in_size, tuple(order), limited)
+        sql = _statement_cache.get(key)
+        if sql is None:
+            sql = "SELECT {} FROM {}".format(','.join(columns), self._table)
+            predicates = ["{}{}?".format(c, op) for op, c, _ in conditions]
+            if in_size:
+                predicates.append("{} IN ({})".format(self._in[0], ','.join('?' * in_size)))
+            if predicates:
+                sql += " WHERE " + " AND ".join(predicates)
+            if order:
+                sql += " ORDER BY " + ','.join(c + (' DESC' if desc else '')
+                                               for c, desc in order)
+            if limited:
+                sql += " LIMIT ? OFFSET ?"
+            _statement_cache.put(key, sql)
+        return sql
+
+
+def _fetch(sql, parameters, chunk_size):
+    """
+    Execute a query on the reader connection, yielding the result rows as they are
+    fetched `chunk_size` at a time.
+    """
+    try:
+        cursor = _execute(_get_reader_connection().cursor(), sql, parameters)
+    except sqlite3.OperationalError as e:
+        _schema_changed_by(e)  # drops the cache if stale, for the next queries
+        raise
+    instrumentation = _instrumentation
+    count = 0
+    seconds = 0.0
+    try:
+        while True:
+            if instrumentation is None:
+                rows = cursor.fetchmany(chunk_size)
+            else:
+                start = time.perf_counter()
+                rows = cursor.fetchmany(chunk_size)
+                seconds += time.perf_counter() - start
+                count += len(rows)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+        if instrumentation is not None:
+            instrumentation.after_fetch(sql, count, seconds)
+
+
+def statement_cache_info():
+    """
+    Returns:
+        dict: Statistics of the cache of SQL strings generated by Query: hits, misses,
+              evictions, size, maxsize.
+    """
+    return _statement_cache.info()
 
 
 def query_where_equal(table, columns, column_value=None, limit=None):
@@ -147,40 +1084,145 @@ def query_where_equal(table, columns, column_value=None, limit=None):
         (list) Query result, as a list of records, each element of which is a tuple of
         values corresponding to the specified columns.
     """
-    _check_table_exists(table)
+    query = Query(table, columns)
+    if column_value:
+        query.where_equal(column_value)
+    if limit is not None:
+        query.limit(limit)
+    return query.all()
 
-    conn = _get_sqlite_connection()
-    cursor = conn.cursor()
-    columns_query = ','.join(columns)
-    parameters = []
-    if column_value is None or len(column_value) == 0:
-        sql = "SELECT {} FROM {}".format(columns_query, table)
-    else:
-        sql = "SELECT {} FROM {} WHERE".format(columns_query, table)
-        for i, c in enumerate(column_value.keys()):
-            if i > 0:
-                sql += " AND"
-            sql += " {}=?".format(c)
-        parameters.extend(column_value.values())
 
-    if limit is not None:
-        sql += " LIMIT ?"
-        parameters.append(limit)
+def query_where_in(table: str, columns, column: str, values):
+    """
+    Query the records whose `column` is in `values`. Long lists of values are split into
+    several queries.
 
-    cursor.execute(sql, parameters)
-    return cursor.fetchall()
+    Args:
+        table: Table name.
+        columns (list): Column names to be queried (cannot be empty).
+        column: Column name for the IN condition.
+        values: A sequence of values.
+
+    Returns:
+        (list) Query result, as a list of records, each element of which is a tuple of
+        values corresponding to the specified columns. The order is unspecified.
+    """
+    return Query(table, columns).where_in(column, values).all()
 
 
-def read_table(table: str):
+def query_where_range(table: str, columns, column: str, begin, end, column_value=None):
     """
-    Read a whole table.
+    Query the records with `begin` <= `column` < `end`, ordered by `column`.
 
     Args:
         table: Table name.
-        
+        columns (list): Column names to be queried (cannot be empty).
+        column: Column name for the range condition.
+        begin: Lower bound (inclusive).
+        end: Upper bound (exclusive).
+        column_value: If given, a dictionary (column: value) of additional equality
+                      conditions.
+
+    Returns:
+        (list) Query result, as a list of records, each element of which is a tuple of
+        values corresponding to the specified columns.
+    """
+    query = Query(table, columns).where_range(column, begin, end)
+    if column_value:
+        query.where_equal(column_value)
+    return query.order_by(column).all()
+
+
+@_retry_on_schema_change
+def query_fts(fts_table: str, match: str, limit=None, offset=0):
+    """
+    Full-text query on an FTS5 table, ranked by relevance (bm25).
+
+    Args:
+        fts_table: Name of the FTS5 table.
+        match: FTS5 query string.
+        limit: If given, the maximum number of results.
+        offset: Number of results to skip.
+
+    Returns:
+        (list) rowids of the matching rows, best match first.
+    """
+    _check_table_exists(fts_table)
+
+    sql = "SELECT rowid FROM {} WHERE {} MATCH ? ORDER BY rank LIMIT ? OFFSET ?".format(
+        fts_table, fts_table)
+    rows = _execute_fetchall(sql, [match, -1 if limit is None else limit, offset])
+    return [r[0] for r in rows]
+
+
+@_retry_on_schema_change
+def query_where_contains(table: str, columns, column: str, text: str, limit=None,
+                         offset=0):
+    """
+    Query the records whose `column` contains `text` (case-insensitive for ASCII), by
+    scanning the table. The records are ordered by id if the table has an "id" column.
+
+    Args:
+        table: Table name.
+        columns (list): Column names to be queried (cannot be empty).
+        column: Column name for the condition.
+        text: The substring to look for.
+        limit: If given, the maximum number of records.
+        offset: Number of records to skip.
+
+    Returns:
+        (list) Query result, as a list of records, each element of which is a tuple of
+        values corresponding to the specified columns.
+    """
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    pattern = '%' + escaped + '%'
+    sql = "SELECT {} FROM {} WHERE {} LIKE ? ESCAPE '\\'".format(','.join(columns), table,
+                                                               column)
+    if _has_id_column(table):
+        sql += " ORDER BY id"
+    sql += " LIMIT ? OFFSET ?"
+    return _execute_fetchall(sql, [pattern, -1 if limit is None else limit, offset])
+
+
+def iter_table(table: str, columns=None, where=None, chunk_size=1000, as_records=False):
+    """
+    Iterate over the records of a table, fetching `chunk_size` records at a time, so
+    that memory usage does not grow with table size.
+
+    Args:
+        table: Table name.
+        columns (list): Column names to be read. If None, all the columns are read.
+        where (dict): If given, a dictionary (column: value) to be used as WHERE condition.
+        chunk_size: Number of records fetched from the database at a time.
+        as_records: If True, yields namedtuples with the columns as fields. Otherwise,
+                    yields plain tuples.
+
+    Returns:
+        An iterator yielding a tuple of values corresponding to `columns` for each record.
+    """
+    query = Query(table, columns)
+    if where:
+        query.where_equal(where)
+    if as_records:
+        query.as_records()
+    return query.iter(chunk_size)
+
+
+def read_table(table: str, index=None):
+    """
+    Read a whole table. Requires pandas, which is imported on the first call.
+
+    Args:
+        table: Table name.
+        index (str): If given, the column to be used as the index of the DataFrame.
+
     Returns:
         A pandas DataFrame.
     """
-    engine = _get_sqlalchemy_engine()
-    df = pd.read_sql_query("SELECT * FROM {};".format(table), engine)
+    import pandas as pd
+
+    columns = _get_table_info(table).columns
+    df = pd.DataFrame.from_records(iter_table(table), columns=columns)
+    if index is not None:
+        df = df.set_index(index)
     return df
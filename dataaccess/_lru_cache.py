@@ -0,0 +1,74 @@
+"""
+A bounded, thread-safe LRU cache with hit/miss/eviction counters.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Maps keys to values, keeping at most `maxsize` entries. When full, adding an entry
+    evicts the least recently used one.
+    """
+
+    def __init__(self, maxsize: int):
+        assert maxsize > 0
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None, check=None):
+        """
+        Returns the value of `key` (marking it as most recently used), or `default` if
+        not cached. If `check` is given, a value for which `check(value)` is false is
+        treated as not cached.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if check is not None and not check(value):
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        """
+        Remove all the entries. The counters are not reset.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def info(self):
+        """
+        Returns:
+            dict: hits, misses, evictions, size, maxsize.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self._data), 'maxsize': self.maxsize}
@@ -0,0 +1,159 @@
+"""
+Indexes and auxiliary tables used by data_access.py, in addition to the tables created
+by 10.create_tables.ipynb. Everything here is created with "IF NOT EXISTS" when the
+database is first used (see `_db_access.register_schema_setup()`).
+"""
+
+import logging
+import sqlite3
+
+_logger = logging.getLogger(__name__)
+
+TABLE_REMINDER_EVENT = 'reminder_event'
+TABLE_AGENDA = 'agenda'
+TABLE_REMINDER_FTS = 'reminder_fts'
+TABLE_CHANGE_LOG = 'change_log'
+
+# Indexes "<table>_name" on the names of the lookup tables, unique unless the table
+# already has duplicate names.
+_NAME_INDEX = "CREATE {}INDEX IF NOT EXISTS {table}_name ON {table} (name);"
+_NAMED_TABLES = ('category', 'scene', 'occasion')
+
+# Inverted index from scene/occasion events to the reminders depending on them.
+# event_type is one of Moment.TYPE_SCENE, TYPE_OCCASION_START, TYPE_OCCASION_END.
+_REMINDER_EVENT = """
+CREATE TABLE IF NOT EXISTS reminder_event (
+    event_type TEXT NOT NULL,
+    target_id INTEGER NOT NULL,
+    reminder_id INTEGER NOT NULL,
+    PRIMARY KEY (event_type, target_id, reminder_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS reminder_event_reminder ON reminder_event (reminder_id);
+"""
+
+# The minutes (0 - 2879) at which each reminder is shown (kind "active") or shows up
+# (kind "fire"), computed from the ActTimeModels.
+_AGENDA = """
+CREATE TABLE IF NOT EXISTS agenda (
+    minute INTEGER NOT NULL,
+    reminder_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    PRIMARY KEY (minute, reminder_id, kind)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS agenda_reminder ON agenda (reminder_id);
+"""
+
+# Full-text index of reminder.content (external content, kept in sync by triggers). The
+# trigram tokenizer matches any substring of 3 or more characters, including CJK text.
+_REMINDER_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS reminder_fts USING fts5 (
+    content, content='reminder', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS reminder_fts_insert AFTER INSERT ON reminder BEGIN
+    INSERT INTO reminder_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS reminder_fts_delete AFTER DELETE ON reminder BEGIN
+    INSERT INTO reminder_fts (reminder_fts, rowid, content)
+    VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS reminder_fts_update AFTER UPDATE OF id, content ON reminder
+BEGIN
+    INSERT INTO reminder_fts (reminder_fts, rowid, content)
+    VALUES ('delete', old.id, old.content);
+    INSERT INTO reminder_fts (rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+# Append-only log of the changes to the base tables, filled by triggers. seq is
+# monotonic (AUTOINCREMENT never reuses a value). op is 'insert', 'update' or 'delete'.
+# An update changing the id is logged as a delete of the old id and an update of the new.
+_CHANGE_LOG = """
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    op TEXT NOT NULL,
+    row_id INTEGER NOT NULL
+);
+"""
+_CHANGE_LOG_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS {table}_log_insert AFTER INSERT ON {table} BEGIN
+    INSERT INTO change_log (table_name, op, row_id) VALUES ('{table}', 'insert', new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_log_update AFTER UPDATE ON {table} BEGIN
+    INSERT INTO change_log (table_name, op, row_id)
+    SELECT '{table}', 'delete', old.id WHERE old.id <> new.id;
+    INSERT INTO change_log (table_name, op, row_id) VALUES ('{table}', 'update', new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_log_delete AFTER DELETE ON {table} BEGIN
+    INSERT INTO change_log (table_name, op, row_id) VALUES ('{table}', 'delete', old.id);
+END;
+"""
+_CHANGE_LOGGED_TABLES = ('category', 'scene', 'occasion', 'reminder')
+
+_AUXILIARY_TABLES = {
+    TABLE_REMINDER_EVENT: _REMINDER_EVENT,
+    TABLE_AGENDA: _AGENDA,
+    TABLE_REMINDER_FTS: _REMINDER_FTS,
+    TABLE_CHANGE_LOG: _CHANGE_LOG + ''.join(_CHANGE_LOG_TRIGGERS.format(table=t)
+                                            for t in _CHANGE_LOGGED_TABLES),
+}
+
+# Tables skipped if not supported by the SQLite library (FTS5 with the trigram tokenizer
+# requires SQLite 3.34).
+_OPTIONAL_TABLES = {TABLE_REMINDER_FTS}
+
+
+def _execute_script(conn, script):
+    """
+    Execute the statements of `script` one by one. Unlike `executescript()`, this does not
+    commit, so the statements are part of the current transaction.
+    """
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ''
+    assert not statement.strip(), 'Incomplete statement: {}'.format(statement)
+
+
+def setup(conn):
+    """
+    Create the indexes and auxiliary tables that do not exist yet. Must be called within
+    a transaction, in which the new tables are to be populated, so that they are not left
+    empty if populating fails.
+
+    Args:
+        conn: sqlite3 connection.
+
+    Returns:
+        set: Names of the auxiliary tables newly created, which need to be populated.
+    """
+    assert conn.in_transaction
+    for table in _NAMED_TABLES:
+        conn.execute("SAVEPOINT name_index;")
+        try:
+            conn.execute(_NAME_INDEX.format('UNIQUE ', table=table))
+        except sqlite3.IntegrityError:
+            conn.execute("ROLLBACK TO name_index;")
+            _logger.warning('Table "%s" has duplicate names; creating a non-unique index '
+                            'on name.', table)
+            conn.execute(_NAME_INDEX.format('', table=table))
+        conn.execute("RELEASE name_index;")
+
+    existing = {r[0] for r in conn.execute("SELECT name FROM sqlite_master;")}
+    created = set()
+    for table, ddl in _AUXILIARY_TABLES.items():
+        conn.execute("SAVEPOINT auxiliary_table;")
+        try:
+            _execute_script(conn, ddl)
+        except sqlite3.OperationalError:
+            conn.execute("ROLLBACK TO auxiliary_table;")
+            conn.execute("RELEASE auxiliary_table;")
+            if table in _OPTIONAL_TABLES:
+                continue
+            raise
+        conn.execute("RELEASE auxiliary_table;")
+        if table not in existing:
+            created.add(table)
+    return created
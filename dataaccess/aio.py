@@ -0,0 +1,229 @@
+"""
+Coroutine versions of the functions of data_access.py, for asyncio services, e.g.,
+
+    scene_id = await aio.get_scene_id('wake up')
+    reminder_ids = await aio.fire_scene(scene_id)
+
+Reads run on a bounded pool of worker threads, each with its own reader connection (see
+_db_access.py), so that the event loop is not blocked by SQLite I/O. Identical reads
+requested concurrently are coalesced: they share one execution and receive the same
+result object, which should therefore not be modified. A read requested after a write
+has completed is never coalesced with one started before. Writes run on a single writer
+thread, in the order of the calls.
+
+Cancellation: a read is cancelled when all the coroutines awaiting it are cancelled. If
+it has not started yet, it will not run; if it is running, its SQLite statement is
+interrupted. A write that has started runs to completion.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import dataaccess._db_access as db
+from dataaccess import data_access
+
+_max_readers = 4
+_read_executor = None
+_write_executor = None
+_executors_lock = threading.Lock()
+
+_inflight = {}  # {(loop, write generation, function, args, kwargs): _Read}, reads in
+                # progress
+_write_generation = 0  # incremented when each write completes, so that a read requested
+                       # after a write never shares a read started before it
+
+
+def configure(max_readers=4):
+    """
+    Set the number of reader threads. Shuts down the current executors, if any.
+    """
+    assert max_readers > 0
+    global _max_readers
+    shutdown()
+    _max_readers = max_readers
+
+
+def shutdown(wait=True):
+    """
+    Shut down the executors, cancelling the calls not started yet. They are created
+    again on the next call.
+    """
+    global _read_executor, _write_executor
+    with _executors_lock:
+        executors = [_read_executor, _write_executor]
+        _read_executor = _write_executor = None
+    for executor in executors:
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _get_executors():
+    """
+    Returns:
+        (read executor, write executor)
+    """
+    global _read_executor, _write_executor
+    with _executors_lock:
+        if _read_executor is None:
+            _read_executor = ThreadPoolExecutor(_max_readers,
+                                                thread_name_prefix='dataaccess-read')
+            _write_executor = ThreadPoolExecutor(1, thread_name_prefix='dataaccess-write')
+        return _read_executor, _write_executor
+
+
+class _Read:
+    """
+    A read in progress, shared by the coroutines awaiting it.
+    """
+
+    def __init__(self):
+        self.future = None
+        self.waiters = 0
+        self.conn = None  # reader connection, while running
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+    def run(self, func, args, kwargs):
+        """
+        Called in a reader thread.
+        """
+        with self.lock:
+            if self.cancelled:
+                return None
+            self.conn = db._get_reader_connection()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self.lock:
+                self.conn = None
+
+    def cancel(self):
+        """
+        Called in the event loop when no coroutine awaits the read any more.
+        """
+        self.future.cancel()
+        with self.lock:
+            self.cancelled = True
+            if self.conn is not None:
+                self.conn.interrupt()
+
+
+async def _run_read(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    key = (loop, _write_generation, func, args, frozenset(kwargs.items()))
+    try:
+        read = _inflight.get(key)
+    except TypeError:  # unhashable arguments, not coalesced
+        key = None
+        read = None
+
+    if read is None:
+        read = _Read()
+        read.future = loop.run_in_executor(_get_executors()[0], read.run, func, args,
+                                           kwargs)
+        if key is not None:
+            _inflight[key] = read
+            read.future.add_done_callback(lambda _: _forget(key, read))
+
+    read.waiters += 1
+    try:
+        return await asyncio.shield(read.future)
+    finally:
+        read.waiters -= 1
+        if read.waiters == 0 and not read.future.done():
+            if key is not None:
+                _forget(key, read)
+            read.cancel()
+
+
+def _forget(key, read):
+    if _inflight.get(key) is read:
+        del _inflight[key]
+
+
+async def _run_write(func, *args, **kwargs):
+    global _write_generation
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_executors()[1],
+                                          functools.partial(func, *args, **kwargs))
+    finally:
+        _write_generation += 1
+
+
+def _read(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await _run_read(func, *args, **kwargs)
+    return wrapper
+
+
+def _write(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await _run_write(func, *args, **kwargs)
+    return wrapper
+
+
+async def run_in_transaction(func, *args, **kwargs):
+    """
+    Call `func(*args, **kwargs)` on the writer thread within `data_access.transaction()`,
+    so that the data_access functions called by `func` are committed together.
+
+    Returns:
+        The return value of `func`.
+    """
+    def run():
+        with data_access.transaction():
+            return func(*args, **kwargs)
+    return await _run_write(run)
+
+
+async def iter_reminder_table(columns=None, page_size=1000):
+    """
+    Asynchronously iterate over the "reminder" table, ordered by ID. Each page of
+    `page_size` reminders is read in a reader thread.
+
+    Yields:
+        A namedtuple for each reminder, with the columns as fields.
+    """
+    loop = asyncio.get_running_loop()
+    pages = data_access.iter_reminder_pages(columns, page_size)
+    while True:
+        page = await loop.run_in_executor(_get_executors()[0], next, pages, None)
+        if page is None:
+            return
+        for record in page:
+            yield record
+
+
+add_category = _write(data_access.add_category)
+add_scene = _write(data_access.add_scene)
+add_occasion = _write(data_access.add_occasion)
+add_reminder = _write(data_access.add_reminder)
+add_reminders = _write(data_access.add_reminders)
+rename_category = _write(data_access.rename_category)
+rename_scene = _write(data_access.rename_scene)
+rename_occasion = _write(data_access.rename_occasion)
+update_reminder = _write(data_access.update_reminder)
+remove_category = _write(data_access.remove_category)
+remove_reminder = _write(data_access.remove_reminder)
+
+get_category_id = _read(data_access.get_category_id)
+get_scene_id = _read(data_access.get_scene_id)
+get_occasion_id = _read(data_access.get_occasion_id)
+get_category_name = _read(data_access.get_category_name)
+get_scene_name = _read(data_access.get_scene_name)
+get_occasion_name = _read(data_access.get_occasion_name)
+fire_scene = _read(data_access.fire_scene)
+fire_occasion_start = _read(data_access.fire_occasion_start)
+fire_occasion_end = _read(data_access.fire_occasion_end)
+read_agenda = _read(data_access.read_agenda)
+search_reminders = _read(data_access.search_reminders)
+load_reminders = _read(data_access.load_reminders)
+read_category_table = _read(data_access.read_category_table)
+read_reminder_table = _read(data_access.read_reminder_table)
+read_scene_table = _read(data_access.read_scene_table)
+read_occasion_table = _read(data_access.read_occasion_table)
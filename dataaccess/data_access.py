@@ -3,13 +3,313 @@ Provides functionality for adding/updating/removing/reading
 reminders/categories
 """
 
+import hashlib
+import logging
+import threading
+import weakref
+from collections import Counter
+
 import dataaccess._db_access as db
+import dataaccess._schema as schema
+from dataaccess._lru_cache import LRUCache
+from act_time_model import ActTimeModel
+from moment import Moment
+from reminder import Reminder
+
+_logger = logging.getLogger(__name__)
 
 _TABLE_CATEGORY = 'category'
 _TABLE_REMINDER = 'reminder'
 _TABLE_SCENE = 'scene'
 _TABLE_OCCASION = 'occasion'
 
+# Kinds of rows of the agenda (see `read_agenda()`).
+AGENDA_ACTIVE = 'active'
+AGENDA_FIRE = 'fire'
+
+# Operations recorded in the change log (see `changes_since()`).
+CHANGE_INSERT = 'insert'
+CHANGE_UPDATE = 'update'
+CHANGE_DELETE = 'delete'
+
+# In-memory copies of the lookup tables (category, scene, occasion), loaded on first use
+# and kept up to date by the add/rename/remove functions once their changes are
+# committed. `_names_generation` is incremented on each change, so that a copy loaded
+# concurrently with a change is not stored.
+_name_maps = {}  # {table: ({name: id}, {id: name})}
+_names_generation = 0
+_names_lock = threading.Lock()
+# Number of changes to each lookup table made by the transaction in progress and not
+# yet applied to the copies; while non-zero, the transaction reads the table itself.
+_uncommitted_names = Counter()
+
+# Decoded ActTimeModels: {reminder_id: (digest of the JSON, ActTimeModel or None)}
+_model_cache = LRUCache(maxsize=4096)
+
+# Identity map of the Reminder objects loaded/added: {reminder_id: Reminder}. Entries go
+# away when the objects are no longer referenced elsewhere.
+_reminders = weakref.WeakValueDictionary()
+_reminders_lock = threading.Lock()
+
+# Subscribers to the change log, and the last seq delivered to them.
+_subscribers = []
+_delivered_seq = 0
+_delivering = threading.local()
+
+
+def decode_act_time_model(reminder_id: int, json_str: str):
+    """
+    Decode the "act_time_model" column of a reminder, using the decoded-model cache.
+    The returned object is shared by the callers and should not be modified.
+
+    Args:
+        reminder_id: Reminder ID.
+        json_str: The stored JSON of the ActTimeModel.
+
+    Returns:
+        The decoded ActTimeModel, or None if `json_str` is in the legacy (textual)
+        encoding, which cannot be decoded.
+    """
+    digest = hashlib.blake2b(json_str.encode(), digest_size=16).digest()
+    entry = _model_cache.get(reminder_id, check=lambda e: e[0] == digest)
+    if entry is not None:
+        return entry[1]
+    try:
+        model = ActTimeModel.from_json(json_str)
+    except ValueError:
+        model = None
+    _model_cache.put(reminder_id, (digest, model))
+    return model
+
+
+def _invalidate_act_time_model(reminder_id):
+    """
+    Drop the cached decoded model of a reminder.
+    """
+    _model_cache.pop(reminder_id)
+
+
+def model_cache_info():
+    """
+    Returns:
+        dict: Statistics of the decoded-model cache: hits, misses, evictions, size,
+              maxsize.
+    """
+    return _model_cache.info()
+
+
+def clear_model_cache():
+    _model_cache.clear()
+
+
+def _setup_schema(conn):
+    """
+    Create the indexes and auxiliary tables, populating the newly created auxiliary tables
+    from the reminder table.
+    """
+    created = schema.setup(conn)
+    if not created:
+        return
+    event_rows = []
+    agenda_rows = []
+    for rem_id, model_json in conn.execute("SELECT id, act_time_model FROM reminder;"):
+        model = decode_act_time_model(rem_id, model_json)
+        if model is not None:
+            event_rows.extend((t, i, rem_id) for t, i in model.event_keys())
+            agenda_rows.extend(_agenda_rows(rem_id, model))
+    if schema.TABLE_REMINDER_EVENT in created:
+        conn.executemany("INSERT INTO {} (event_type, target_id, reminder_id) "
+                         "VALUES (?,?,?);".format(schema.TABLE_REMINDER_EVENT), event_rows)
+    if schema.TABLE_AGENDA in created:
+        conn.executemany("INSERT INTO {} (minute, reminder_id, kind) "
+                         "VALUES (?,?,?);".format(schema.TABLE_AGENDA), agenda_rows)
+    if schema.TABLE_REMINDER_FTS in created:
+        conn.execute("INSERT INTO {0} ({0}) VALUES ('rebuild');".format(
+            schema.TABLE_REMINDER_FTS))
+
+
+db.register_schema_setup(_setup_schema)
+
+
+def clear_name_cache():
+    """
+    Drop the cached names of categories/scenes/occasions. They will be reloaded on next
+    use. Call this if the lookup tables may have been changed by another process.
+    """
+    global _names_generation
+    with _names_lock:
+        _name_maps.clear()
+        _names_generation += 1
+
+
+def clear_identity_map():
+    """
+    Forget the Reminder objects loaded, so that `load_reminders()` creates new objects
+    from the database. Call this if the reminders may have been changed by another
+    process.
+    """
+    with _reminders_lock:
+        _reminders.clear()
+
+
+def _forget_on_rollback(reminder_ids):
+    """
+    Drop the reminders from the identity map and the decoded-model cache if the current
+    transaction scope, in which they are written, is rolled back.
+    """
+    def forget():
+        with _reminders_lock:
+            for rem_id in reminder_ids:
+                _reminders.pop(rem_id, None)
+        for rem_id in reminder_ids:
+            _invalidate_act_time_model(rem_id)
+
+    db.call_on_rollback(forget)
+
+
+def _get_name_maps(table):
+    """
+    Returns:
+        ({name: id}, {id: name}) of the lookup table `table`, loading it if not cached.
+        They should not be modified.
+    """
+    with _names_lock:
+        maps = _name_maps.get(table)
+        generation = _names_generation
+    if maps is not None and not (db.in_transaction() and _uncommitted_names[table]):
+        return maps
+
+    rows = list(db.iter_table(table, ['id', 'name']))
+    maps = ({name: i for i, name in rows}, {i: name for i, name in rows})
+    if not db.in_transaction():  # otherwise, may include uncommitted changes
+        with _names_lock:
+            if _names_generation == generation:
+                _name_maps.setdefault(table, maps)
+    return maps
+
+
+def _update_names(table, func):
+    """
+    Apply `func(name_to_id, id_to_name)` to the cached names of `table` once the changes
+    made so far are committed.
+    """
+    def apply():
+        global _names_generation
+        with _names_lock:
+            maps = _name_maps.get(table)
+            if maps is not None:
+                func(*maps)
+            _names_generation += 1
+
+    if not db.in_transaction():
+        apply()
+        return
+
+    def on_commit():
+        _uncommitted_names[table] -= 1
+        apply()
+
+    def on_rollback():
+        _uncommitted_names[table] -= 1
+
+    _uncommitted_names[table] += 1
+    db.call_after_commit(on_commit, on_rollback)
+
+
+def _add_name(table, name):
+    """
+    Add a record to the lookup table `table`, and to the cache.
+
+    Returns:
+        int: ID of the newly added record.
+    """
+    new_id = db.add_record(table, {'name': name})
+    assert new_id is not None
+
+    def add(name_to_id, id_to_name):
+        name_to_id[name] = new_id
+        id_to_name[new_id] = name
+
+    _update_names(table, add)
+    return new_id
+
+
+def _rename(table, old_name, new_name):
+    """
+    Rename a record in the lookup table `table`, and in the cache.
+
+    Returns:
+        bool: False if `old_name` is not found.
+    """
+    record_id = _get_name_maps(table)[0].get(old_name)
+    if record_id is None:
+        return False
+    db.update_record(table, {'id': record_id, 'name': new_name})
+
+    def rename(name_to_id, id_to_name):
+        name_to_id.pop(old_name, None)
+        name_to_id[new_name] = record_id
+        id_to_name[record_id] = new_name
+
+    _update_names(table, rename)
+    return True
+
+
+def _agenda_rows(reminder_id, act_time_model):
+    """
+    Returns:
+        A list of (minute, reminder_id, kind), the rows of the agenda for the reminder.
+    """
+    rows = []
+    active = set()
+    for begin, end in act_time_model.active_intervals():
+        active.update(range(begin, end))
+    rows.extend((m, reminder_id, AGENDA_ACTIVE) for m in sorted(active))
+    fire = set()
+    for r in act_time_model.fire_ranges():
+        fire.update(r)
+    rows.extend((m, reminder_id, AGENDA_FIRE) for m in sorted(fire))
+    return rows
+
+
+def _index_reminders(id_models):
+    """
+    Add the rows of the auxiliary tables for reminders newly added/updated. Should be
+    called within a transaction.
+
+    Args:
+        id_models: A list of (reminder ID, ActTimeModel).
+    """
+    rows = [{'event_type': t, 'target_id': i, 'reminder_id': rem_id}
+            for rem_id, model in id_models for t, i in model.event_keys()]
+    db.add_records(schema.TABLE_REMINDER_EVENT, rows)
+    rows = [{'minute': m, 'reminder_id': rem_id, 'kind': kind}
+            for rem_id, model in id_models for m, _, kind in _agenda_rows(rem_id, model)]
+    db.add_records(schema.TABLE_AGENDA, rows)
+
+
+def _unindex_reminder(reminder_id):
+    """
+    Remove the rows of the auxiliary tables for a reminder. Should be called within a
+    transaction.
+    """
+    db.delete_where_equal(schema.TABLE_REMINDER_EVENT, {'reminder_id': reminder_id})
+    db.delete_where_equal(schema.TABLE_AGENDA, {'reminder_id': reminder_id})
+
+
+def transaction():
+    """
+    Returns a context manager within which all the changes are committed together when
+    the (outermost) block exits, or rolled back if an exception is raised. Blocks can be
+    nested. Outside any such block, each function commits its changes immediately.
+
+    Example:
+        with data_access.transaction():
+            data_access.rename_category('health', 'fitness')
+            data_access.update_reminder(rem)
+    """
+    return db.transaction()
+
 
 def add_category(category: str):
     """
@@ -21,9 +321,7 @@ def add_category(category: str):
     Returns:
         int: ID of the newly added category.
     """
-    cat_id = db.add_record(_TABLE_CATEGORY, {'name': category})
-    assert cat_id is not None
-    return cat_id
+    return _add_name(_TABLE_CATEGORY, category)
 
 
 def add_scene(scene: str):
@@ -36,9 +334,7 @@ def add_scene(scene: str):
     Returns:
         int: ID of the newly added scene.
     """
-    scene_id = db.add_record(_TABLE_SCENE, {'name': scene})
-    assert scene_id is not None
-    return scene_id
+    return _add_name(_TABLE_SCENE, scene)
 
 
 def add_occasion(occasion: str):
@@ -51,9 +347,7 @@ def add_occasion(occasion: str):
     Returns:
         int: ID of the newly added occasion.
     """
-    occ_id = db.add_record(_TABLE_OCCASION, {'name': occasion})
-    assert occ_id is not None
-    return occ_id
+    return _add_name(_TABLE_OCCASION, occasion)
 
 
 def add_reminder(reminder):
@@ -66,9 +360,36 @@ def add_reminder(reminder):
     """
     assert reminder.id is None
     field_values = reminder.to_dict(exclude_id=True)
-    rem_id = db.add_record(_TABLE_REMINDER, field_values)
-    assert rem_id is not None
+    with db.transaction():
+        rem_id = db.add_record(_TABLE_REMINDER, field_values)
+        assert rem_id is not None
+        _index_reminders([(rem_id, reminder.act_time_model)])
+        _forget_on_rollback([rem_id])
     reminder.id = rem_id
+    with _reminders_lock:
+        _reminders[rem_id] = reminder
+
+
+def add_reminders(reminders):
+    """
+    Add the reminders to database in a single transaction. The newly created reminder
+    IDs will be assigned to attribute `id` of each reminder.
+
+    Args:
+        reminders: A list of Reminder objects.
+    """
+    assert all(rem.id is None for rem in reminders)
+    rows = [rem.to_dict(exclude_id=True) for rem in reminders]
+    with db.transaction():
+        rem_ids = db.add_records(_TABLE_REMINDER, rows)
+        assert rem_ids is not None
+        _index_reminders([(rem_id, rem.act_time_model)
+                          for rem_id, rem in zip(rem_ids, reminders)])
+        _forget_on_rollback(rem_ids)
+    with _reminders_lock:
+        for rem, rem_id in zip(reminders, rem_ids):
+            rem.id = rem_id
+            _reminders[rem_id] = rem
 
 
 def rename_category(old_name: str, new_name: str):
@@ -77,9 +398,8 @@ def rename_category(old_name: str, new_name: str):
         old_name: Original name of the category to be renamed.
         new_name: New name.
     """
-    cat_id = get_category_id(old_name)
-    assert cat_id is not None, 'Category "{}" not found.'.format(old_name)
-    db.update_record(_TABLE_CATEGORY, {'id': cat_id, 'name': new_name})
+    found = _rename(_TABLE_CATEGORY, old_name, new_name)
+    assert found, 'Category "{}" not found.'.format(old_name)
 
 
 def rename_scene(old_name: str, new_name: str):
@@ -88,9 +408,8 @@ def rename_scene(old_name: str, new_name: str):
         old_name: Original name of the scene to be renamed.
         new_name: New name.
     """
-    scene_id = get_scene_id(old_name)
-    assert scene_id is not None, 'Scene "{}" not found.'.format(old_name)
-    db.update_record(_TABLE_SCENE, {'id': scene_id, 'name': new_name})
+    found = _rename(_TABLE_SCENE, old_name, new_name)
+    assert found, 'Scene "{}" not found.'.format(old_name)
 
 
 def rename_occasion(old_name: str, new_name: str):
@@ -99,9 +418,8 @@ def rename_occasion(old_name: str, new_name: str):
         old_name: Original name of the occasion to be renamed.
         new_name: New name.
     """
-    occ_id = get_occasion_id(old_name)
-    assert occ_id is not None, 'Occasion "{}" not found.'.format(old_name)
-    db.update_record(_TABLE_OCCASION, {'id': occ_id, 'name': new_name})
+    found = _rename(_TABLE_OCCASION, old_name, new_name)
+    assert found, 'Occasion "{}" not found.'.format(old_name)
 
 
 def update_reminder(reminder):
@@ -113,7 +431,17 @@ def update_reminder(reminder):
     """
     assert reminder.id is not None
     field_values = reminder.to_dict(exclude_id=False)
-    db.update_record(_TABLE_REMINDER, field_values)
+    with db.transaction():
+        found = db.update_record(_TABLE_REMINDER, field_values) > 0
+        if found:
+            _unindex_reminder(reminder.id)
+            _index_reminders([(reminder.id, reminder.act_time_model)])
+            _forget_on_rollback([reminder.id])
+    assert found, 'Reminder {} not found.'.format(reminder.id)
+    _invalidate_act_time_model(reminder.id)
+    with _reminders_lock:
+        if _reminders.get(reminder.id) is not reminder:
+            _reminders.pop(reminder.id, None)
 
 
 def remove_category(category: str):
@@ -128,6 +456,12 @@ def remove_category(category: str):
     assert len(rems) == 0, 'Category "{}" is associated to a reminder.'.format(category)
     db.delete_record(_TABLE_CATEGORY, cat_id)
 
+    def remove(name_to_id, id_to_name):
+        name_to_id.pop(category, None)
+        id_to_name.pop(cat_id, None)
+
+    _update_names(_TABLE_CATEGORY, remove)
+
 
 # def remove_scene(scene: str):
 #     """
@@ -146,7 +480,13 @@ def remove_reminder(reminder_id: int):
     Args:
         reminder_id: ID of reminder to be removed.
     """
-    db.delete_record(_TABLE_REMINDER, reminder_id)
+    with db.transaction():
+        db.delete_record(_TABLE_REMINDER, reminder_id)
+        _unindex_reminder(reminder_id)
+        _forget_on_rollback([reminder_id])
+    _invalidate_act_time_model(reminder_id)
+    with _reminders_lock:
+        _reminders.pop(reminder_id, None)
 
 
 def get_category_id(category: str):
@@ -157,11 +497,7 @@ def get_category_id(category: str):
     Returns:
         int: ID of the category, or None if the category is not found.
     """
-    r = db.query_where_equal(_TABLE_CATEGORY, ['id'], column_value={'name': category}, limit=1)
-    if len(r) > 0:
-        return r[0][0]
-    else:
-        return None
+    return _get_name_maps(_TABLE_CATEGORY)[0].get(category)
 
 
 def get_scene_id(scene: str):
@@ -172,11 +508,7 @@ def get_scene_id(scene: str):
     Returns:
         int: ID of the scene, or None if the scene is not found.
     """
-    r = db.query_where_equal(_TABLE_SCENE, ['id'], column_value={'name': scene}, limit=1)
-    if len(r) > 0:
-        return r[0][0]
-    else:
-        return None
+    return _get_name_maps(_TABLE_SCENE)[0].get(scene)
 
 
 def get_occasion_id(occasion: str):
@@ -187,11 +519,217 @@ def get_occasion_id(occasion: str):
     Returns:
         int: ID of the occasion, or None if the occasion is not found.
     """
-    r = db.query_where_equal(_TABLE_OCCASION, ['id'], column_value={'name': occasion}, limit=1)
-    if len(r) > 0:
-        return r[0][0]
+    return _get_name_maps(_TABLE_OCCASION)[0].get(occasion)
+
+
+def get_category_name(category_id: int):
+    """
+    Args:
+        category_id: Category ID.
+
+    Returns:
+        str: Name of the category, or None if the category is not found.
+    """
+    return _get_name_maps(_TABLE_CATEGORY)[1].get(category_id)
+
+
+def get_scene_name(scene_id: int):
+    """
+    Args:
+        scene_id: Scene ID.
+
+    Returns:
+        str: Name of the scene, or None if the scene is not found.
+    """
+    return _get_name_maps(_TABLE_SCENE)[1].get(scene_id)
+
+
+def get_occasion_name(occasion_id: int):
+    """
+    Args:
+        occasion_id: Occasion ID.
+
+    Returns:
+        str: Name of the occasion, or None if the occasion is not found.
+    """
+    return _get_name_maps(_TABLE_OCCASION)[1].get(occasion_id)
+
+
+def _get_reminders_of_event(event_type, target_id):
+    """
+    Returns:
+        list: IDs of the reminders depending on the event.
+    """
+    rows = db.query_where_equal(schema.TABLE_REMINDER_EVENT, ['reminder_id'],
+                                {'event_type': event_type, 'target_id': target_id})
+    return [r[0] for r in rows]
+
+
+def fire_scene(scene_id: int):
+    """
+    Args:
+        scene_id: ID of the scene happening.
+
+    Returns:
+        list: IDs of the reminders depending on the scene.
+    """
+    return _get_reminders_of_event(Moment.TYPE_SCENE, scene_id)
+
+
+def fire_occasion_start(occasion_id: int):
+    """
+    Args:
+        occasion_id: ID of the occasion starting.
+
+    Returns:
+        list: IDs of the reminders depending on the start of the occasion.
+    """
+    return _get_reminders_of_event(Moment.TYPE_OCCASION_START, occasion_id)
+
+
+def fire_occasion_end(occasion_id: int):
+    """
+    Args:
+        occasion_id: ID of the occasion ending.
+
+    Returns:
+        list: IDs of the reminders depending on the end of the occasion (including those
+              shown during the occasion).
+    """
+    return _get_reminders_of_event(Moment.TYPE_OCCASION_END, occasion_id)
+
+
+def read_agenda(begin=0, end=2880, kind=None):
+    """
+    Read the materialized agenda, which is kept up to date by add_reminder(s),
+    update_reminder and remove_reminder.
+
+    Args:
+        begin: Start minute (inclusive), 0 - 2879.
+        end: End minute (exclusive), 1 - 2880.
+        kind: If given, AGENDA_ACTIVE (minutes during the time-interval periods of
+              "periods" models) or AGENDA_FIRE (minutes at which reminders show up).
+              Otherwise, both.
+
+    Returns:
+        A list of (minute, reminder ID, kind), ordered by minute.
+    """
+    return db.query_where_range(schema.TABLE_AGENDA, ['minute', 'reminder_id', 'kind'],
+                                'minute', begin, end,
+                                None if kind is None else {'kind': kind})
+
+
+def search_reminders(text: str, limit=20, offset=0):
+    """
+    Search the reminders whose content contains `text`.
+
+    Uses the full-text index (ranked by relevance) if `text` is at least 3 characters
+    long and the index is available; otherwise, scans the reminder table (ordered by ID).
+
+    Args:
+        text: The text to search for, matched as a substring (case-insensitive).
+        limit: Maximum number of results.
+        offset: Number of results to skip, for pagination.
+
+    Returns:
+        A list of Reminder objects.
+    """
+    text = text.strip()
+    if not text:
+        return []
+    if len(text) >= 3 and db.table_exists(schema.TABLE_REMINDER_FTS):
+        match = '"{}"'.format(text.replace('"', '""'))  # as a single phrase
+        ids = db.query_fts(schema.TABLE_REMINDER_FTS, match, limit, offset)
     else:
-        return None
+        rows = db.query_where_contains(_TABLE_REMINDER, ['id'], 'content', text,
+                                       limit, offset)
+        ids = [r[0] for r in rows]
+    return load_reminders(ids)
+
+
+def latest_change_seq():
+    """
+    Returns:
+        int: The seq of the latest change in the change log, or 0 if none.
+    """
+    row = db.Query(schema.TABLE_CHANGE_LOG, ['seq']).order_by('seq', descending=True) \
+        .first()
+    return 0 if row is None else row[0]
+
+
+def changes_since(seq: int, limit=None):
+    """
+    Read the changes made to the reminder/category/scene/occasion tables after `seq`.
+
+    To keep a view up to date, get `latest_change_seq()`, then read the tables, then
+    apply the changes since that seq (by re-reading, or dropping, the rows concerned).
+    A change may then be applied to a row already up to date, which is harmless.
+
+    Args:
+        seq: A seq returned by `latest_change_seq()`, or the seq of the last change
+             applied. 0 for all the changes.
+        limit: If given, the maximum number of changes returned.
+
+    Returns:
+        A list of namedtuples (seq, table_name, op, row_id), ordered by seq. op is one of
+        CHANGE_INSERT, CHANGE_UPDATE, CHANGE_DELETE.
+    """
+    query = db.Query(schema.TABLE_CHANGE_LOG).as_records() \
+        .where_range('seq', seq + 1).order_by('seq')
+    if limit is not None:
+        query.limit(limit)
+    return query.all()
+
+
+def subscribe(callback):
+    """
+    Register `callback(changes)` to be called after each commit made by this process,
+    with the list of changes (as returned by `changes_since()`) committed since the
+    previous call. Changes made by other processes are included in the next call, and
+    can be polled with `changes_since()`.
+
+    The callback is called by the committing thread. It may call the functions of this
+    module; the changes it makes are delivered after it returns. Exceptions raised by it
+    are logged, not propagated to the committing call.
+    """
+    global _delivered_seq
+    # the writer lock, held while the commit callbacks are called, keeps the list and the
+    # seq consistent with the deliveries
+    with db._writer_lock:
+        if not _subscribers:
+            _delivered_seq = latest_change_seq()
+        _subscribers.append(callback)
+
+
+def unsubscribe(callback):
+    with db._writer_lock:
+        _subscribers.remove(callback)
+
+
+def _deliver_changes():
+    """
+    Commit callback, delivering the new changes to the subscribers.
+    """
+    global _delivered_seq
+    if not _subscribers or getattr(_delivering, 'active', False):
+        return
+    _delivering.active = True
+    try:
+        while True:
+            changes = changes_since(_delivered_seq)
+            if not changes:
+                break
+            for callback in list(_subscribers):
+                try:
+                    callback(changes)
+                except Exception:
+                    _logger.exception('Subscriber %r failed', callback)
+            _delivered_seq = changes[-1].seq
+    finally:
+        _delivering.active = False
+
+
+db.register_commit_callback(_deliver_changes)
 
 
 def read_category_table():
@@ -201,7 +739,7 @@ def read_category_table():
     Returns:
         A pandas DataFrame.
     """
-    return db.read_table(_TABLE_CATEGORY).set_index('id')
+    return db.read_table(_TABLE_CATEGORY, index='id')
 
 
 def read_reminder_table():
@@ -211,7 +749,94 @@ def read_reminder_table():
     Returns:
         A pandas DataFrame.
     """
-    return db.read_table(_TABLE_REMINDER).set_index('id')
+    return db.read_table(_TABLE_REMINDER, index='id')
+
+
+def iter_reminder_table(columns=None, chunk_size=1000):
+    """
+    Iterate over the "reminder" table without loading it as a whole.
+
+    Args:
+        columns (list): Column names to be read. If None, all the columns are read.
+        chunk_size: Number of records fetched from the database at a time.
+
+    Yields:
+        A namedtuple for each reminder, with the columns as fields.
+    """
+    return db.iter_table(_TABLE_REMINDER, columns, chunk_size=chunk_size, as_records=True)
+
+
+def iter_reminder_pages(columns=None, page_size=1000):
+    """
+    Iterate over the "reminder" table in pages ordered by ID. Each page is read with a
+    separate query (keyset pagination), so the iteration can be resumed from any thread.
+
+    Args:
+        columns (list): Column names to be read. If None, all the columns are read.
+        page_size: Number of reminders per page.
+
+    Yields:
+        A list of at most `page_size` namedtuples, with the columns as fields.
+    """
+    return db.Query(_TABLE_REMINDER, columns).as_records().pages(page_size)
+
+
+def load_reminders(ids=None):
+    """
+    Load reminders as Reminder objects. A reminder already loaded (and still referenced)
+    is returned as the same object, without querying the database again.
+
+    Args:
+        ids: A list of reminder IDs. If None, all the reminders are loaded.
+
+    Returns:
+        A list of Reminder objects, in the order of `ids` (IDs not found are skipped), or
+        in the order of ID if `ids` is None.
+    """
+    columns = ['id', 'category_id', 'content', 'act_time_model']
+    loaded = {}  # strong references, as `_reminders` holds only weak ones
+    if ids is None:
+        rows = sorted(db.iter_table(_TABLE_REMINDER, columns))
+        ids = [r[0] for r in rows]
+    else:
+        with _reminders_lock:
+            for i in ids:
+                rem = _reminders.get(i)
+                if rem is not None:
+                    loaded[i] = rem
+        missing = list({i for i in ids if i not in loaded})
+        rows = db.query_where_in(_TABLE_REMINDER, columns, 'id', missing) \
+            if missing else []
+
+    # Decode outside the lock; another thread may load the same reminders meanwhile, in
+    # which case the objects it has put in the identity map are used.
+    new = {}
+    for rem_id, category_id, content, model_json in rows:
+        if rem_id not in loaded:
+            model = decode_act_time_model(rem_id, model_json)
+            if model is not None:
+                model = model.copy()  # the cached model is shared
+            new[rem_id] = Reminder.from_values(rem_id, category_id, content, model)
+    with _reminders_lock:
+        for rem_id, rem in new.items():
+            existing = _reminders.get(rem_id)
+            if existing is None:
+                _reminders[rem_id] = rem
+            loaded[rem_id] = existing or rem
+    return [loaded[i] for i in ids if i in loaded]
+
+
+def iter_act_time_models(chunk_size=1000):
+    """
+    Iterate over the ActTimeModels of all the reminders, decoded through the
+    decoded-model cache. The yielded models are shared and should not be modified.
+
+    Yields:
+        (reminder ID, ActTimeModel or None if the stored JSON cannot be decoded)
+    """
+    for rem_id, model_json in db.iter_table(_TABLE_REMINDER, ['id', 'act_time_model'],
+                                            chunk_size=chunk_size):
+        yield rem_id, decode_act_time_model(rem_id, model_json)
 
 
 def read_scene_table():
@@ -221,7 +846,7 @@ def read_scene_table():
     Returns:
         A pandas DataFrame.
     """
-    return db.read_table(_TABLE_SCENE).set_index('id')
+    return db.read_table(_TABLE_SCENE, index='id')
 
 
 def read_occasion_table():
@@ -231,4 +856,4 @@ def read_occasion_table():
     Returns:
         A pandas DataFrame.
     """
-    return db.read_table(_TABLE_OCCASION).set_index('id')
+    return db.read_table(_TABLE_OCCASION, index='id')
@@ -0,0 +1,284 @@
+"""
+Instrumentation of the SQL statements executed by _db_access.py: timing histograms and
+row counts per normalized statement, commit/rollback counts, an estimate of the fsyncs
+made by commits, slow-statement logging, and user hooks.
+
+Usage:
+    from dataaccess import instrumentation
+
+    inst = instrumentation.enable(slow_seconds=0.05)
+    ...
+    print(inst.snapshot())
+    print(inst.to_prometheus())
+    instrumentation.disable()
+
+When disabled (the default), _db_access only checks a global variable per statement.
+"""
+
+import logging
+import re
+import threading
+
+import dataaccess._db_access as db
+
+_logger = logging.getLogger(__name__)
+
+# Upper bounds (in seconds) of the histogram buckets; the last bucket is +Inf.
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+           0.5, 1.0, 2.5, 5.0)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+_normalized = {}  # {sql: normalized sql}, bounded by _MAX_NORMALIZED
+_MAX_NORMALIZED = 1024
+
+
+def normalize_sql(sql: str):
+    """
+    Returns:
+        `sql` with literals replaced by "?", lists of "?" collapsed into "...", and
+        whitespace collapsed, so that statements differing only in values are grouped.
+    """
+    normalized = _normalized.get(sql)
+    if normalized is None:
+        normalized = _STRING_LITERAL.sub('?', sql)
+        normalized = _NUMBER_LITERAL.sub('?', normalized)
+        normalized = _PLACEHOLDER_LIST.sub('...', normalized)
+        normalized = _WHITESPACE.sub(' ', normalized).strip().rstrip(';')
+        if len(_normalized) >= _MAX_NORMALIZED:
+            _normalized.clear()
+        _normalized[sql] = normalized
+    return normalized
+
+
+def estimated_fsyncs_per_commit(journal_mode: str, synchronous):
+    """
+    Returns:
+        Estimated number of fsync calls made by SQLite per write commit. In WAL mode with
+        synchronous=NORMAL, the WAL is only synced at checkpoints, which are not counted.
+    """
+    levels = {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3}
+    level = levels.get(str(synchronous).upper(), synchronous)
+    if not isinstance(level, int) or level == 0:
+        return 0
+    journal_mode = journal_mode.upper()
+    if journal_mode == 'WAL':
+        return 0 if level == 1 else 1
+    if journal_mode in ('MEMORY', 'OFF'):
+        return 1
+    # rollback journal: journal (plus its header with FULL), database (plus directory
+    # with EXTRA)
+    return level + 1
+
+
+class _StatementStats:
+
+    __slots__ = ('count', 'seconds', 'max_seconds', 'bucket_counts', 'rows',
+                 'fetch_seconds', 'errors')
+
+    def __init__(self, n_buckets):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.bucket_counts = [0] * (n_buckets + 1)
+        self.rows = 0
+        self.fetch_seconds = 0.0
+        self.errors = 0
+
+
+class Instrumentation:
+    """
+    Receives the notifications of _db_access (see `_db_access.set_instrumentation()`) and
+    aggregates them. Thread-safe.
+    """
+
+    def __init__(self, slow_seconds=None, buckets=BUCKETS):
+        """
+        Args:
+            slow_seconds: If given, statements (or fetches) taking at least this many
+                          seconds are logged as warnings.
+            buckets: Upper bounds (in seconds) of the histogram buckets, increasing.
+        """
+        self.slow_seconds = slow_seconds
+        self.buckets = tuple(buckets)
+        self._pre_hooks = []
+        self._post_hooks = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._statements = {}  # {normalized sql: _StatementStats}
+            self.commits = 0
+            self.commit_seconds = 0.0
+            self.rollbacks = 0
+            self.estimated_fsyncs = 0
+
+    def add_pre_hook(self, func):
+        """
+        Register `func(sql, parameters)`, called before each statement is executed.
+        """
+        self._pre_hooks.append(func)
+
+    def add_post_hook(self, func):
+        """
+        Register `func(sql, parameters, seconds, rowcount, error)`, called after each
+        statement is executed.
+        """
+        self._post_hooks.append(func)
+
+    def remove_hook(self, func):
+        for hooks in (self._pre_hooks, self._post_hooks):
+            if func in hooks:
+                hooks.remove(func)
+
+    def _stats(self, sql):
+        key = normalize_sql(sql)
+        stats = self._statements.get(key)
+        if stats is None:
+            stats = self._statements[key] = _StatementStats(len(self.buckets))
+        return stats
+
+    def before_execute(self, sql, parameters):
+        for func in self._pre_hooks:
+            func(sql, parameters)
+
+    def after_execute(self, sql, parameters, seconds, rowcount, error):
+        bucket = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                bucket = i
+                break
+        with self._lock:
+            stats = self._stats(sql)
+            stats.count += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.bucket_counts[bucket] += 1
+            if rowcount > 0:
+                stats.rows += rowcount
+            if error is not None:
+                stats.errors += 1
+        if self.slow_seconds is not None and seconds >= self.slow_seconds:
+            _logger.warning('Slow statement (%.1f ms): %s', seconds * 1000,
+                            normalize_sql(sql))
+        for func in self._post_hooks:
+            func(sql, parameters, seconds, rowcount, error)
+
+    def after_fetch(self, sql, rows, seconds):
+        with self._lock:
+            stats = self._stats(sql)
+            stats.rows += rows
+            stats.fetch_seconds += seconds
+        if self.slow_seconds is not None and seconds >= self.slow_seconds:
+            _logger.warning('Slow fetch of %d rows (%.1f ms): %s', rows, seconds * 1000,
+                            normalize_sql(sql))
+
+    def after_commit(self, seconds):
+        fsyncs = estimated_fsyncs_per_commit(db._JOURNAL_MODE, db._PRAGMAS['synchronous'])
+        with self._lock:
+            self.commits += 1
+            self.commit_seconds += seconds
+            self.estimated_fsyncs += fsyncs
+
+    def after_rollback(self):
+        with self._lock:
+            self.rollbacks += 1
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {
+                'statements': {normalized sql: {'count', 'seconds', 'max_seconds',
+                               'buckets': [(upper bound, cumulative count), ...],
+                               'rows', 'fetch_seconds', 'errors'}},
+                'commits', 'commit_seconds', 'rollbacks', 'estimated_fsyncs'
+            }
+        """
+        with self._lock:
+            statements = {}
+            for sql, stats in self._statements.items():
+                cumulative = 0
+                buckets = []
+                for bound, n in zip(self.buckets + (float('inf'),), stats.bucket_counts):
+                    cumulative += n
+                    buckets.append((bound, cumulative))
+                statements[sql] = {'count': stats.count, 'seconds': stats.seconds,
+                                   'max_seconds': stats.max_seconds, 'buckets': buckets,
+                                   'rows': stats.rows, 'fetch_seconds': stats.fetch_seconds,
+                                   'errors': stats.errors}
+            return {'statements': statements, 'commits': self.commits,
+                    'commit_seconds': self.commit_seconds, 'rollbacks': self.rollbacks,
+                    'estimated_fsyncs': self.estimated_fsyncs}
+
+    def to_prometheus(self, prefix='dataaccess'):
+        """
+        Returns:
+            str: The metrics in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        lines = ['# HELP {}_statement_seconds Time spent executing SQL statements.'
+                 .format(prefix),
+                 '# TYPE {}_statement_seconds histogram'.format(prefix)]
+        for sql, stats in snapshot['statements'].items():
+            label = 'sql="{}"'.format(_escape_label(sql))
+            for bound, n in stats['buckets']:
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('{}_statement_seconds_bucket{{{},le="{}"}} {}'
+                             .format(prefix, label, le, n))
+            lines.append('{}_statement_seconds_sum{{{}}} {!r}'
+                         .format(prefix, label, stats['seconds']))
+            lines.append('{}_statement_seconds_count{{{}}} {}'
+                         .format(prefix, label, stats['count']))
+
+        for name, key, help_text in (
+                ('statement_rows_total', 'rows', 'Rows modified or fetched.'),
+                ('statement_fetch_seconds_total', 'fetch_seconds',
+                 'Time spent fetching query results.'),
+                ('statement_errors_total', 'errors', 'Statements that raised an error.')):
+            lines.append('# HELP {}_{} {}'.format(prefix, name, help_text))
+            lines.append('# TYPE {}_{} counter'.format(prefix, name))
+            for sql, stats in snapshot['statements'].items():
+                lines.append('{}_{}{{sql="{}"}} {!r}'
+                             .format(prefix, name, _escape_label(sql), stats[key]))
+
+        for name, key, help_text in (
+                ('commits_total', 'commits', 'Write transactions committed.'),
+                ('commit_seconds_total', 'commit_seconds', 'Time spent committing.'),
+                ('rollbacks_total', 'rollbacks', 'Rollbacks.'),
+                ('estimated_fsyncs_total', 'estimated_fsyncs',
+                 'Estimated fsync calls made by commits.')):
+            lines.append('# HELP {}_{} {}'.format(prefix, name, help_text))
+            lines.append('# TYPE {}_{} counter'.format(prefix, name))
+            lines.append('{}_{} {!r}'.format(prefix, name, snapshot[key]))
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def enable(slow_seconds=None, buckets=BUCKETS):
+    """
+    Install a new Instrumentation in _db_access.
+
+    Returns:
+        The Instrumentation installed.
+    """
+    instrumentation = Instrumentation(slow_seconds, buckets)
+    db.set_instrumentation(instrumentation)
+    return instrumentation
+
+
+def disable():
+    db.set_instrumentation(None)
+
+
+def current():
+    """
+    Returns:
+        The Instrumentation installed, or None.
+    """
+    return db._instrumentation
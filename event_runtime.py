@@ -0,0 +1,203 @@
+import heapq
+
+from moment import Moment
+from period import Period
+
+
+class EventRuntime:
+    """
+    Tracks the scene/occasion events at run time, and maintains incrementally the set of
+    reminders shown because of them, i.e., the reminders of "periods" models having
+      + an occasion period: shown while the occasion is open,
+      + a scene extended period, occasion start/end extended period: shown for `span`
+        minutes after the scene/start of occasion/end of occasion.
+
+    A window of a reminder's period opens on the event and closes on the end of the
+    occasion or on expiry. Expiry times are kept in a min-heap, so `advance()` only
+    touches the windows that expire. If the event happens again while a window is open,
+    the window is extended.
+
+    Times (`now`) are in minutes, and must not decrease between calls.
+
+    Each of the event methods and `advance()` returns (activated, deactivated), the sets of
+    reminder IDs that become shown/hidden by the call.
+    """
+
+    def __init__(self):
+        # {(event type, scene/occasion ID): [(reminder_id, period index, span), ...]}
+        # span (in minutes) is None for occasion periods, which close on occasion end.
+        self._by_event = {}
+        self._event_keys = {}  # {reminder_id: [(event key, period index), ...]}
+        self._open_occasions = set()
+        self._windows = {}  # {(reminder_id, period index): expiry, or None for occasion}
+        self._expiry_heap = []  # [(expiry, reminder_id, period index), ...]
+        self._active = {}  # {reminder_id: number of open windows}
+        self._now = None
+
+    @classmethod
+    def from_reminders(cls, reminders):
+        """
+        Args:
+            reminders: An iterable of Reminder objects.
+        """
+        runtime = cls()
+        for rem in reminders:
+            runtime.add(rem.id, rem.act_time_model)
+        return runtime
+
+    def add(self, reminder_id: int, act_time_model):
+        """
+        Add (or replace) a reminder. Windows of occasion periods are opened immediately if
+        the occasion is open.
+
+        Returns:
+            (activated, deactivated)
+        """
+        _, deactivated = self.remove(reminder_id)
+        activated = set()
+        keys = []
+        periods = act_time_model.periods if act_time_model else []
+        for i, p in enumerate(periods):
+            t = p.type
+            if t == Period.TYPE_SCENE_EXTENDED:
+                key = (Moment.TYPE_SCENE, p.start_moment.scene_id)
+            elif t in (Period.TYPE_OCCASION, Period.TYPE_OCCASION_START_EXTENDED):
+                key = (Moment.TYPE_OCCASION_START, p.start_moment.start_of_occasion_id)
+            elif t == Period.TYPE_OCCASION_END_EXTENDED:
+                key = (Moment.TYPE_OCCASION_END, p.start_moment.end_of_occasion_id)
+            else:
+                continue
+            span = None if t == Period.TYPE_OCCASION else p.span.to_minutes()
+            self._by_event.setdefault(key, []).append((reminder_id, i, span))
+            keys.append((key, i))
+            if span is None and key[1] in self._open_occasions:
+                self._open_window(reminder_id, i, None, activated)
+        if keys:
+            self._event_keys[reminder_id] = keys
+        return activated - deactivated, deactivated - activated
+
+    def remove(self, reminder_id: int):
+        """
+        Remove a reminder, closing its windows.
+
+        Returns:
+            (activated, deactivated)
+        """
+        deactivated = set()
+        for key, i in self._event_keys.pop(reminder_id, []):
+            entries = [e for e in self._by_event[key] if e[0] != reminder_id]
+            if entries:
+                self._by_event[key] = entries
+            else:
+                del self._by_event[key]
+            if (reminder_id, i) in self._windows:
+                self._close_window((reminder_id, i), deactivated)
+        return set(), deactivated
+
+    def active_reminders(self):
+        """
+        Returns:
+            frozenset: IDs of the reminders currently shown because of scene/occasion events.
+        """
+        return frozenset(self._active)
+
+    def is_occasion_open(self, occasion_id: int):
+        return occasion_id in self._open_occasions
+
+    def scene_happened(self, scene_id: int, now):
+        """
+        Returns:
+            (activated, deactivated)
+        """
+        return self._on_event((Moment.TYPE_SCENE, scene_id), now)
+
+    def occasion_started(self, occasion_id: int, now):
+        """
+        Returns:
+            (activated, deactivated)
+        """
+        self._open_occasions.add(occasion_id)
+        return self._on_event((Moment.TYPE_OCCASION_START, occasion_id), now)
+
+    def occasion_ended(self, occasion_id: int, now):
+        """
+        Returns:
+            (activated, deactivated)
+        """
+        activated, deactivated = self.advance(now)
+        if occasion_id in self._open_occasions:
+            self._open_occasions.discard(occasion_id)
+            for reminder_id, i, span in \
+                    self._by_event.get((Moment.TYPE_OCCASION_START, occasion_id), []):
+                if span is None and (reminder_id, i) in self._windows:
+                    self._close_window((reminder_id, i), deactivated)
+        a, d = self._on_event((Moment.TYPE_OCCASION_END, occasion_id), now)
+        activated |= a
+        deactivated |= d
+        return activated - deactivated, deactivated - activated
+
+    def next_expiry(self):
+        """
+        Returns:
+            The earliest time at which an open window expires, or None.
+        """
+        heap = self._expiry_heap
+        while heap and self._windows.get((heap[0][1], heap[0][2]), -1) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def advance(self, now):
+        """
+        Move the clock to `now`, closing the windows expiring at or before `now`.
+
+        Returns:
+            (activated, deactivated)
+        """
+        assert self._now is None or now >= self._now
+        self._now = now
+        deactivated = set()
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expiry, reminder_id, i = heapq.heappop(heap)
+            if self._windows.get((reminder_id, i), -1) == expiry:
+                self._close_window((reminder_id, i), deactivated)
+        return set(), deactivated
+
+    def _on_event(self, key, now):
+        activated, deactivated = self.advance(now)
+        for reminder_id, i, span in self._by_event.get(key, []):
+            if span is None:
+                self._open_window(reminder_id, i, None, activated)
+            elif span > 0:
+                self._open_window(reminder_id, i, now + span, activated)
+        return activated - deactivated, deactivated - activated
+
+    def _open_window(self, reminder_id, i, expiry, activated):
+        """
+        Open (or extend) a window, adding the reminder to `activated` if it becomes shown.
+        """
+        window = (reminder_id, i)
+        if window not in self._windows:
+            count = self._active.get(reminder_id, 0)
+            if count == 0:
+                activated.add(reminder_id)
+            self._active[reminder_id] = count + 1
+        elif self._windows[window] is None or \
+                (expiry is not None and expiry <= self._windows[window]):
+            return
+        self._windows[window] = expiry
+        if expiry is not None:
+            heapq.heappush(self._expiry_heap, (expiry, reminder_id, i))
+
+    def _close_window(self, window, deactivated):
+        """
+        Close a window, adding the reminder to `deactivated` if it becomes hidden.
+        """
+        del self._windows[window]
+        reminder_id = window[0]
+        count = self._active[reminder_id] - 1
+        if count == 0:
+            del self._active[reminder_id]
+            deactivated.add(reminder_id)
+        else:
+            self._active[reminder_id] = count
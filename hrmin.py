@@ -4,9 +4,15 @@ class HrMin:
     Attributes:
         hr (int): hour, can be 0 - 47
         mn (int): minute, can be 0 - 59
+
+    HrMin objects are immutable and backed by the number of minutes. There is only one
+    instance for each of the 2880 values: HrMin(hr, mn) and HrMin.from_minutes() return
+    the cached instance.
     """
 
-    def __init__(self, hr: int, mn: int):
+    __slots__ = ('_minutes',)
+
+    def __new__(cls, hr: int, mn: int):
         """
         Args:
             hr: 0 - 47
@@ -14,8 +20,7 @@ class HrMin:
         """
         assert 0 <= hr <= 47
         assert 0 <= mn <= 59
-        self.hr = hr
-        self.mn = mn
+        return _INSTANCES[hr * 60 + mn]
 
     @classmethod
     def from_minutes(cls, minutes: int):
@@ -24,21 +29,65 @@ class HrMin:
             minutes: 0 - 2879
         """
         assert 0 <= minutes <= 2879
-        return cls(minutes // 60, minutes % 60)
+        return _INSTANCES[minutes]
+
+    @property
+    def hr(self):
+        return self._minutes // 60
+
+    @property
+    def mn(self):
+        return self._minutes % 60
 
     @property
     def hour(self):
-        return self.hr
+        return self._minutes // 60
 
     @property
     def minute(self):
-        return self.mn
+        return self._minutes % 60
 
     def to_minutes(self):
-        return self.hr * 60 + self.mn
+        return self._minutes
+
+    def __setattr__(self, name, value):
+        raise AttributeError('HrMin is immutable.')
+
+    def __reduce__(self):
+        return HrMin.from_minutes, (self._minutes,)
+
+    def __eq__(self, other):
+        if isinstance(other, HrMin):
+            return self._minutes == other._minutes
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, HrMin):
+            return self._minutes != other._minutes
+        return NotImplemented
 
     def __lt__(self, other):
-        return (self.hr, self.mn) < (other.hr, other.mn)
+        if isinstance(other, HrMin):
+            return self._minutes < other._minutes
+        return NotImplemented
+
+    def __le__(self, other):
+        if isinstance(other, HrMin):
+            return self._minutes <= other._minutes
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, HrMin):
+            return self._minutes > other._minutes
+        return NotImplemented
+
+    def __ge__(self, other):
+        if isinstance(other, HrMin):
+            return self._minutes >= other._minutes
+        return NotImplemented
+
+    def __hash__(self):
+        return self._minutes
 
     def __add__(self, other) -> int:
         """
@@ -49,9 +98,9 @@ class HrMin:
              Minutes.
         """
         if isinstance(other, HrMin):
-            return self.to_minutes() + other.to_minutes()
+            return self._minutes + other._minutes
         elif isinstance(other, int):
-            return self.to_minutes() + other
+            return self._minutes + other
         else:
             raise TypeError('Invalid type of `other`')
 
@@ -62,7 +111,7 @@ class HrMin:
         Returns:
             The difference (self - other), in minutes.
         """
-        return (self.hr - other.hr) * 60 + (self.mn - other.mn)
+        return self._minutes - other._minutes
 
     @staticmethod
     def _normalize(hr: int, mn: int):
@@ -73,5 +122,16 @@ class HrMin:
         return hr + mn // 60, mn % 60
 
     def __str__(self):
-        return '{:02d}:{:02d}'.format(self.hr, self.minute)
+        return '{:02d}:{:02d}'.format(self._minutes // 60, self._minutes % 60)
+
+    def __repr__(self):
+        return 'HrMin({}, {})'.format(self._minutes // 60, self._minutes % 60)
+
+
+def _create_instance(minutes):
+    hm = object.__new__(HrMin)
+    object.__setattr__(hm, '_minutes', minutes)
+    return hm
+
 
+_INSTANCES = tuple(_create_instance(m) for m in range(2880))
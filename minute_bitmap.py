@@ -0,0 +1,139 @@
+import numpy as np
+
+MINUTES = 2880  # number of minutes in the 2-day HrMin range
+_BYTES = MINUTES // 8
+
+
+class MinuteBitmap:
+    """
+    The activity profiles of a set of reminders over the 2-day range 0 - 2879 minutes,
+    stored as one 2-D array of packed bits (a row of 2880 bits per reminder), so that
+    queries over all the reminders are answered with vectorized bitwise operations.
+
+    The bit of a minute is set if the reminder is shown at that minute (time-interval
+    periods, see `ActTimeModel.active_intervals()`) or shows up at that minute (see
+    `ActTimeModel.fire_ranges()`). Scenes and occasions are not taken into account.
+
+    Attributes:
+        reminder_ids (numpy.ndarray): IDs of the reminders, one for each row of `bits`.
+        bits (numpy.ndarray): uint8 array of shape (number of reminders, 360). Bit
+                              (7 - m % 8) of bits[i, m // 8] is for minute m.
+    """
+
+    def __init__(self, reminder_ids, bits):
+        """
+        Args:
+            reminder_ids: A sequence of reminder IDs.
+            bits: uint8 array of shape (len(reminder_ids), 360).
+        """
+        self.reminder_ids = np.asarray(reminder_ids, dtype=np.int64)
+        self.bits = np.asarray(bits, dtype=np.uint8).reshape(len(self.reminder_ids), _BYTES)
+        self._row_of_id = None
+
+    @staticmethod
+    def compile(act_time_model):
+        """
+        Returns:
+            numpy.ndarray: The packed bits (360 uint8) of the model.
+        """
+        minutes = np.zeros(MINUTES, dtype=bool)
+        if act_time_model is not None:
+            for begin, end in act_time_model.active_intervals():
+                minutes[begin:end] = True
+            for r in act_time_model.fire_ranges():
+                minutes[r.start:r.stop:r.step] = True
+        return np.packbits(minutes)
+
+    @classmethod
+    def from_reminders(cls, reminders):
+        """
+        Args:
+            reminders: A sequence of Reminder objects.
+        """
+        bits = np.empty((len(reminders), _BYTES), dtype=np.uint8)
+        for i, rem in enumerate(reminders):
+            bits[i] = cls.compile(rem.act_time_model)
+        return cls([rem.id for rem in reminders], bits)
+
+    def __len__(self):
+        return len(self.reminder_ids)
+
+    def _row(self, reminder_id):
+        if self._row_of_id is None:
+            self._row_of_id = {rid: i for i, rid in enumerate(self.reminder_ids.tolist())}
+        return self._row_of_id[reminder_id]
+
+    def _unpack(self, begin, end, rows=slice(None)):
+        """
+        Returns:
+            bool array of shape (number of rows, end - begin), for minutes [begin, end).
+        """
+        assert 0 <= begin <= end <= MINUTES
+        packed = self.bits[rows, begin // 8:(end + 7) // 8]
+        unpacked = np.unpackbits(packed, axis=-1)
+        offset = begin - begin // 8 * 8
+        return unpacked[..., offset:offset + end - begin].view(bool)
+
+    def active_at(self, minute: int):
+        """
+        Returns:
+            numpy.ndarray: IDs of the reminders whose bit of `minute` is set.
+        """
+        mask = np.uint8(0x80 >> (minute % 8))
+        return self.reminder_ids[(self.bits[:, minute // 8] & mask) != 0]
+
+    def active_between(self, begin: int, end: int):
+        """
+        Returns:
+            numpy.ndarray: IDs of the reminders with any bit set in minutes [begin, end).
+        """
+        return self.reminder_ids[self._unpack(begin, end).any(axis=1)]
+
+    def agenda(self, begin=0, end=MINUTES):
+        """
+        Returns:
+            A list of (minute, IDs of the reminders whose bit of the minute is set), for
+            the minutes in [begin, end) with at least one reminder.
+        """
+        rows, cols = np.nonzero(self._unpack(begin, end).T)
+        if len(rows) == 0:
+            return []
+        ids = self.reminder_ids[cols]
+        minutes, starts = np.unique(rows, return_index=True)
+        groups = np.split(ids, starts[1:])
+        return [(int(m) + begin, g) for m, g in zip(minutes, groups)]
+
+    def counts(self, begin=0, end=MINUTES):
+        """
+        Returns:
+            numpy.ndarray: Number of reminders with the bit set, for each minute in
+                           [begin, end).
+        """
+        return self._unpack(begin, end).sum(axis=0)
+
+    def free_minutes(self, begin=0, end=MINUTES):
+        """
+        Returns:
+            numpy.ndarray: The minutes in [begin, end) at which no bit is set.
+        """
+        union = np.bitwise_or.reduce(self.bits, axis=0) if len(self) \
+            else np.zeros(_BYTES, dtype=np.uint8)
+        free = ~np.unpackbits(union)[begin:end].view(bool)
+        return np.nonzero(free)[0] + begin
+
+    def overlap(self, reminder_id_1: int, reminder_id_2: int):
+        """
+        Returns:
+            numpy.ndarray: The minutes at which the bits of both reminders are set.
+        """
+        both = self.bits[self._row(reminder_id_1)] & self.bits[self._row(reminder_id_2)]
+        return np.nonzero(np.unpackbits(both))[0]
+
+    def overlap_counts(self):
+        """
+        Returns:
+            numpy.ndarray: An (n, n) array whose (i, j) element is the number of minutes at
+                           which the bits of reminders i and j are both set.
+        """
+        unpacked = np.unpackbits(self.bits, axis=1).astype(np.float32)
+        return (unpacked @ unpacked.T).astype(np.int64)
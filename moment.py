@@ -9,6 +9,12 @@ class Moment:
       + start of an occasion
       + end of an occasion
     Use the class methods to get an Moment instance of specific type.
+
+    Moment objects are immutable and hashable.
+
+    Attributes:
+        type (str): One of the TYPE_* constants, or None if the object is not set.
+        value: The scene ID, HrMin, or occasion ID, according to `type`.
     """
 
     TYPE_SCENE = 'scene'
@@ -16,22 +22,25 @@ class Moment:
     TYPE_OCCASION_START = 'occasion start'
     TYPE_OCCASION_END = 'occasion end'
 
-    def __init__(self):
+    # Type codes used by `encode()` and `decode()`.
+    CODE_SCENE = 0
+    CODE_HRMIN = 1
+    CODE_OCCASION_START = 2
+    CODE_OCCASION_END = 3
+
+    __slots__ = ('type', 'value')
+
+    def __init__(self, moment_type=None, value=None):
         """
-        Creates an "empty" object.
+        Creates an "empty" object if no argument is given.
         You can use the class methods to get an instance of specific type.
-        Only the relevant attribute will/should be set, leaving the other 3 as None.
         """
-        self.scene_id = None
-        self.hrmin = None
-        self.start_of_occasion_id = None
-        self.end_of_occasion_id = None
+        object.__setattr__(self, 'type', moment_type)
+        object.__setattr__(self, 'value', value)
 
     @classmethod
     def scene_moment(cls, scene_id: int):
-        m = cls()
-        m.scene_id = scene_id
-        return m
+        return cls(Moment.TYPE_SCENE, scene_id)
 
     @classmethod
     def hrmin_moment(cls, hr=None, mn=None, hrmin=None):
@@ -42,55 +51,104 @@ class Moment:
             hrmin (HrMin): an HrMin object
         """
         assert (hr is None and mn is None) or hrmin is None
-        m = cls()
-        if hr:
-            m.hrmin = HrMin(hr, mn)
-        elif hrmin:
-            m.hrmin = hrmin
-        else:
+        if hr is not None:
+            hrmin = HrMin(hr, mn)
+        elif hrmin is None:
             raise ValueError('Either (`hr`, `mn`) or `hrmin` should be given.')
-        return m
+        return cls(Moment.TYPE_HRMIN, hrmin)
 
     @classmethod
     def occasion_start_moment(cls, occasion_id: int):
-        m = cls()
-        m.start_of_occasion_id = occasion_id
-        return m
+        return cls(Moment.TYPE_OCCASION_START, occasion_id)
 
     @classmethod
     def occasion_end_moment(cls, occasion_id: int):
-        m = cls()
-        m.end_of_occasion_id = occasion_id
-        return m
+        return cls(Moment.TYPE_OCCASION_END, occasion_id)
+
+    @property
+    def scene_id(self):
+        return self.value if self.type == Moment.TYPE_SCENE else None
+
+    @property
+    def hrmin(self):
+        return self.value if self.type == Moment.TYPE_HRMIN else None
 
     @property
-    def type(self):
+    def start_of_occasion_id(self):
+        return self.value if self.type == Moment.TYPE_OCCASION_START else None
+
+    @property
+    def end_of_occasion_id(self):
+        return self.value if self.type == Moment.TYPE_OCCASION_END else None
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Moment is immutable.')
+
+    def __reduce__(self):
+        return Moment, (self.type, self.value)
+
+    def __eq__(self, other):
+        if isinstance(other, Moment):
+            return self.type == other.type and self.value == other.value
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.type, self.value))
+
+    def encode(self):
         """
         Returns:
-            None if the object is not set.
+            A lossless JSON-serializable representation [type code, value], where value
+            is the scene/occasion ID, or the HrMin in minutes.
         """
-        if self.scene_id:
-            return Moment.TYPE_SCENE
-        elif self.hrmin:
-            return Moment.TYPE_HRMIN
-        elif self.start_of_occasion_id:
-            return Moment.TYPE_OCCASION_START
-        elif self.end_of_occasion_id:
-            return Moment.TYPE_OCCASION_END
-        else:
-            return None
+        t = self.type
+        if t == Moment.TYPE_HRMIN:
+            return [Moment.CODE_HRMIN, self.value.to_minutes()]
+        code = _CODE_OF_TYPE.get(t)
+        if code is None:
+            raise ValueError('Cannot encode an empty Moment.')
+        return [code, self.value]
+
+    @classmethod
+    def decode(cls, code):
+        """
+        Args:
+            code: [type code, value], as returned by `encode()`.
+        """
+        try:
+            type_code, value = code
+        except (TypeError, ValueError):
+            raise ValueError('Invalid Moment code {!r}.'.format(code)) from None
+        if type(type_code) is not int or type(value) is not int:
+            raise ValueError('Invalid Moment code {!r}.'.format(code))
+        if type_code == Moment.CODE_HRMIN:
+            if not 0 <= value <= 2879:
+                raise ValueError('Invalid minutes in Moment code {!r}.'.format(code))
+            return cls(Moment.TYPE_HRMIN, HrMin.from_minutes(value))
+        try:
+            return cls(_TYPE_OF_CODE[type_code], value)
+        except (KeyError, TypeError):
+            raise ValueError('Invalid Moment type code {}.'.format(type_code))
 
     def __str__(self):
-        if self.scene_id:
-            return 'scene {}'.format(self.scene_id)
-        elif self.hrmin:
-            return str(self.hrmin)
-        elif self.start_of_occasion_id:
-            return 'occasion {} start'.format(self.start_of_occasion_id)
-        elif self.end_of_occasion_id:
-            return 'occasion {} end'.format(self.end_of_occasion_id)
+        t = self.type
+        if t == Moment.TYPE_SCENE:
+            return 'scene {}'.format(self.value)
+        elif t == Moment.TYPE_HRMIN:
+            return str(self.value)
+        elif t == Moment.TYPE_OCCASION_START:
+            return 'occasion {} start'.format(self.value)
+        elif t == Moment.TYPE_OCCASION_END:
+            return 'occasion {} end'.format(self.value)
         else:
             return 'none'
 
     def __repr__(self):
         return str(self)
+
+
+_CODE_OF_TYPE = {Moment.TYPE_SCENE: Moment.CODE_SCENE,
+                 Moment.TYPE_HRMIN: Moment.CODE_HRMIN,
+                 Moment.TYPE_OCCASION_START: Moment.CODE_OCCASION_START,
+                 Moment.TYPE_OCCASION_END: Moment.CODE_OCCASION_END}
+_TYPE_OF_CODE = {code: t for t, code in _CODE_OF_TYPE.items()}
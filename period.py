@@ -11,7 +11,10 @@ class Period:
       + a start/end of occasion extended by a time span
     Use the class methods to get an instance of specific type.
 
+    Period objects are immutable and hashable.
+
     Attributes:
+        type (str): One of the TYPE_* constants, or None if the object is not set.
         start_moment (Moment): The start moment.
         span (HrMin): Time span. None if the Period is an occasion.
     """
@@ -22,9 +25,16 @@ class Period:
     TYPE_OCCASION_START_EXTENDED = 'occasion start extended'
     TYPE_OCCASION_END_EXTENDED = 'occasion end extended'
 
-    def __init__(self):
-        self.start_moment = None
-        self.span = None
+    __slots__ = ('type', 'start_moment', 'span')
+
+    def __init__(self, period_type=None, start_moment=None, span=None):
+        """
+        Creates an "empty" object if no argument is given.
+        You can use the class methods to get an instance of specific type.
+        """
+        object.__setattr__(self, 'type', period_type)
+        object.__setattr__(self, 'start_moment', start_moment)
+        object.__setattr__(self, 'span', span)
 
     @classmethod
     def hrmin_interval_period(cls, start_hrmin, end_hrmin=None, span_hrmin=None):
@@ -38,76 +48,107 @@ class Period:
         assert end_hrmin is None or span_hrmin is None, \
             'Only 1 of the arguments `end_hrmin`, `span_hrmin` can be given.'
 
-        span = None
-        if end_hrmin:
+        if end_hrmin is not None:
             assert start_hrmin < end_hrmin
             span = HrMin.from_minutes(end_hrmin - start_hrmin)
-        elif span_hrmin:
+        elif span_hrmin is not None:
             assert start_hrmin + span_hrmin < 2880
             span = span_hrmin
         else:
             raise ValueError('Either `end_hrmin` or `span_hrmin` should be given.')
-
-        p = cls()
-        p.start_moment = Moment.hrmin_moment(hrmin=start_hrmin)
-        p.span = span
-        return p
+        return cls(Period.TYPE_TIME_INTERVAL, Moment.hrmin_moment(hrmin=start_hrmin), span)
 
     @classmethod
     def occasion_period(cls, occasion_id: int):
-        p = cls()
-        p.start_moment = Moment.occasion_start_moment(occasion_id)
-        p.span = None
-        return p
+        return cls(Period.TYPE_OCCASION, Moment.occasion_start_moment(occasion_id), None)
 
     @classmethod
     def scene_extended_period(cls, scene_id: int, span: HrMin):
-        p = cls()
-        p.start_moment = Moment.scene_moment(scene_id)
-        p.span = span
-        return p
+        return cls(Period.TYPE_SCENE_EXTENDED, Moment.scene_moment(scene_id), span)
 
     @classmethod
     def occasion_start_extended_period(cls, occasion_id: int, span: HrMin):
-        p = cls()
-        p.start_moment = Moment.occasion_start_moment(occasion_id)
-        p.span = span
-        return p
+        return cls(Period.TYPE_OCCASION_START_EXTENDED,
+                   Moment.occasion_start_moment(occasion_id), span)
 
     @classmethod
     def occasion_end_extended_period(cls, occasion_id: int, span: HrMin):
-        p = cls()
-        p.start_moment = Moment.occasion_end_moment(occasion_id)
-        p.span = span
-        return p
+        return cls(Period.TYPE_OCCASION_END_EXTENDED,
+                   Moment.occasion_end_moment(occasion_id), span)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Period is immutable.')
 
-    @property
-    def type(self):
+    def __reduce__(self):
+        return Period, (self.type, self.start_moment, self.span)
+
+    def __eq__(self, other):
+        if isinstance(other, Period):
+            return self.type == other.type and self.start_moment == other.start_moment \
+                and self.span == other.span
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.type, self.start_moment, self.span))
+
+    def to_minute_interval(self):
         """
         Returns:
-            None if the object is not set.
+            (begin, end) in minutes (0 - 2880), with `end` exclusive, if the Period is a
+            time interval. Otherwise, None.
         """
-        if self.start_moment.type == Moment.TYPE_HRMIN:
-            return Period.TYPE_TIME_INTERVAL
-        elif self.start_moment.type == Moment.TYPE_SCENE:
-            return Period.TYPE_SCENE_EXTENDED
-        elif self.start_moment.type == Moment.TYPE_OCCASION_START:
-            if self.span is None:
-                return Period.TYPE_OCCASION
-            else:
-                return Period.TYPE_OCCASION_START_EXTENDED
-        elif self.start_moment.type == Moment.TYPE_OCCASION_END:
-            return Period.TYPE_OCCASION_END_EXTENDED
-        else:
+        if self.type != Period.TYPE_TIME_INTERVAL:
             return None
+        begin = self.start_moment.hrmin.to_minutes()
+        return begin, begin + self.span.to_minutes()
+
+    def encode(self):
+        """
+        Returns:
+            A lossless JSON-serializable representation [moment type code, moment value,
+            span], where the first two elements are those of `start_moment.encode()`, and
+            span is in minutes (None for an occasion).
+        """
+        if self.start_moment is None:
+            raise ValueError('Cannot encode an empty Period.')
+        code = self.start_moment.encode()
+        code.append(None if self.span is None else self.span.to_minutes())
+        return code
+
+    @classmethod
+    def decode(cls, code):
+        """
+        Args:
+            code: [moment type code, moment value, span], as returned by `encode()`.
+        """
+        try:
+            type_code, value, span = code
+        except (TypeError, ValueError):
+            raise ValueError('Invalid Period code {!r}.'.format(code)) from None
+        start_moment = Moment.decode((type_code, value))
+        if span is None:
+            if type_code != Moment.CODE_OCCASION_START:
+                raise ValueError('Span is missing in Period code {}.'.format(code))
+            return cls(Period.TYPE_OCCASION, start_moment, None)
+        if type(span) is not int or not 0 <= span <= 2879:
+            raise ValueError('Invalid span in Period code {!r}.'.format(code))
+        if type_code == Moment.CODE_HRMIN and value + span >= 2880:
+            raise ValueError('Period code {!r} ends after 2 days.'.format(code))
+        return cls(_EXTENDED_TYPE_OF_CODE[type_code], start_moment, HrMin.from_minutes(span))
 
     def __str__(self):
         if self.start_moment is None:
             return 'none'
 
-        assert self.start_moment.type is not None
-        if self.start_moment.type == Moment.TYPE_OCCASION_START and self.span is None:
+        if self.type == Period.TYPE_OCCASION:
             return 'occasion {}'.format(self.start_moment.start_of_occasion_id)
 
         assert self.span is not None
         return 'since {} for {}'.format(self.start_moment, self.span)
+
+
+# Period type of each Moment type code of the start moment, for periods with a span.
+_EXTENDED_TYPE_OF_CODE = {Moment.CODE_HRMIN: Period.TYPE_TIME_INTERVAL,
+                          Moment.CODE_SCENE: Period.TYPE_SCENE_EXTENDED,
+                          Moment.CODE_OCCASION_START: Period.TYPE_OCCASION_START_EXTENDED,
+                          Moment.CODE_OCCASION_END: Period.TYPE_OCCASION_END_EXTENDED}
@@ -39,18 +39,34 @@ class Reminder:
             field_values['id'] = self._id
         return field_values
 
-    # @classmethod
-    # def from_dict(cls, field_value_dict):
-    #     """
-    #     Args:
-    #         field_value_dict: A dictionary whose keys are the fields in the database table.
-    #     """
-    #     rem = cls()
-    #     rem._id = field_value_dict['id']
-    #     rem.category_id = field_value_dict['category_id']
-    #     rem.content = field_value_dict['content']
-    #     rem.up_when = field_value_dict['up_when']
-    #     return rem
+    @classmethod
+    def from_values(cls, reminder_id, category_id, content, act_time_model):
+        """
+        Args:
+            reminder_id (int): The ID of the reminder in the database.
+            category_id: int or None
+            content (str): Textual content of the reminder.
+            act_time_model (ActTimeModel): Defines when the reminder shows up.
+        """
+        rem = cls()
+        rem._id = reminder_id
+        rem.category_id = category_id
+        rem.content = content
+        rem.act_time_model = act_time_model
+        return rem
+
+    @classmethod
+    def from_dict(cls, field_value_dict):
+        """
+        Args:
+            field_value_dict: A dictionary whose keys are the fields in the database table.
+        """
+        rem = cls()
+        rem._id = field_value_dict['id']
+        rem.category_id = field_value_dict['category_id']
+        rem.content = field_value_dict['content']
+        rem.act_time_model = ActTimeModel.from_json(field_value_dict['act_time_model'])
+        return rem
 
     # def __str__(self):
     #     return 'id: {}, category_id: {}, content: "{}", up_when: "{}"' \
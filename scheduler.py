@@ -0,0 +1,154 @@
+import heapq
+
+
+def _next_in_ranges(ranges, t):
+    """
+    Returns:
+        The smallest minute > `t` in any of `ranges`, or None.
+    """
+    best = None
+    for r in ranges:
+        if r.start > t:
+            x = r.start
+        else:
+            x = r.start + ((t - r.start) // r.step + 1) * r.step
+        if x < r.stop and (best is None or x < best):
+            best = x
+    return best
+
+
+class Scheduler:
+    """
+    Keeps the next firing time of each reminder in a min-heap, over the 2-day range
+    0 - 2879 minutes. Advancing the clock pops only the firings that are due, and each
+    firing reschedules only the reminder concerned, in O(log n).
+
+    The firing times of a reminder are given by `ActTimeModel.fire_ranges()` (HrMin
+    moments and (start, step) tuples in time-interval periods).
+    """
+
+    def __init__(self, now=-1):
+        """
+        Args:
+            now: The current minute. Only firings after `now` are scheduled.
+        """
+        self._now = now
+        self._ranges = {}  # {reminder_id: [range, ...]}
+        self._heap = []  # [(minute, reminder_id, version), ...]
+        self._versions = {}  # {reminder_id: version of its valid heap entry}
+        self._next_version = 0
+        self._stale = 0  # number of invalid entries in the heap
+
+    @classmethod
+    def from_reminders(cls, reminders, now=-1):
+        """
+        Args:
+            reminders: An iterable of Reminder objects.
+            now: The current minute.
+        """
+        s = cls(now)
+        for rem in reminders:
+            s.add(rem.id, rem.act_time_model)
+        return s
+
+    @property
+    def now(self):
+        return self._now
+
+    def __len__(self):
+        """
+        Returns:
+            Number of reminders with a pending firing.
+        """
+        return len(self._versions)
+
+    def add(self, reminder_id: int, act_time_model):
+        """
+        Add (or replace) a reminder, scheduling its next firing after the current minute.
+
+        Args:
+            reminder_id: Reminder ID.
+            act_time_model (ActTimeModel): The model of the reminder.
+        """
+        self.remove(reminder_id)
+        ranges = act_time_model.fire_ranges() if act_time_model else []
+        if ranges:
+            self._ranges[reminder_id] = ranges
+            self._schedule(reminder_id, self._now)
+
+    def remove(self, reminder_id: int):
+        """
+        Remove a reminder. Its heap entry, if any, is discarded lazily.
+        """
+        self._ranges.pop(reminder_id, None)
+        if self._versions.pop(reminder_id, None) is not None:
+            self._stale += 1
+            if self._stale > 32 and self._stale > len(self._heap) // 2:
+                self._compact()
+
+    def _schedule(self, reminder_id, after):
+        """
+        Push the next firing of the reminder after minute `after`, if any.
+        """
+        t = _next_in_ranges(self._ranges[reminder_id], after)
+        if t is None:
+            self._versions.pop(reminder_id, None)
+            return
+        version = self._next_version
+        self._next_version += 1
+        self._versions[reminder_id] = version
+        heapq.heappush(self._heap, (t, reminder_id, version))
+
+    def _compact(self):
+        """
+        Drop the invalid entries from the heap.
+        """
+        self._heap = [e for e in self._heap if self._versions.get(e[1]) == e[2]]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def _discard_stale_top(self):
+        heap = self._heap
+        while heap and self._versions.get(heap[0][1]) != heap[0][2]:
+            heapq.heappop(heap)
+            self._stale -= 1
+
+    def next_fire_time(self):
+        """
+        Returns:
+            The minute of the earliest pending firing, or None if there is none. A caller
+            can sleep until then.
+        """
+        self._discard_stale_top()
+        return self._heap[0][0] if self._heap else None
+
+    def advance(self, now: int):
+        """
+        Move the clock to minute `now`, popping the firings in (previous now, `now`].
+
+        Returns:
+            A list of (minute, reminder_id), in order of minute.
+        """
+        assert now >= self._now
+        fired = []
+        heap = self._heap
+        while True:
+            self._discard_stale_top()
+            if not heap or heap[0][0] > now:
+                break
+            t, reminder_id, _ = heapq.heappop(heap)
+            fired.append((t, reminder_id))
+            self._schedule(reminder_id, t)
+        self._now = now
+        return fired
+
+    def restart(self, now=-1):
+        """
+        Reschedule all the reminders from minute `now`, e.g., at the start of a new day.
+        """
+        self._now = now
+        self._heap = []
+        self._versions = {}
+        self._stale = 0
+        for reminder_id in self._ranges:
+            self._schedule(reminder_id, now)
@@ -0,0 +1,60 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hrmin import HrMin
+from period import Period
+from act_time_model import ActTimeModel
+from activity_index import ActivityIndex
+
+
+def _random_periods_model(rng):
+    periods = []
+    for _ in range(rng.randint(1, 3)):
+        if rng.random() < 0.2:
+            periods.append(Period.occasion_period(rng.randint(1, 5)))
+        else:
+            start = HrMin.from_minutes(rng.randrange(2880 - 200))
+            span = HrMin.from_minutes(rng.choice([0, 1, rng.randint(1, 180)]))
+            periods.append(Period.hrmin_interval_period(start, span_hrmin=span))
+    return ActTimeModel.periods_model(periods)
+
+
+class ActivityIndexTest(unittest.TestCase):
+
+    def test_zero_span_period(self):
+        model = ActTimeModel.periods_model(
+            [Period.hrmin_interval_period(HrMin(1, 0), span_hrmin=HrMin(0, 0))])
+        index = ActivityIndex()
+        index.add(1, model)
+        self.assertEqual(index.active_at(60), set())
+        self.assertEqual(index.active_between(0, 2880), set())
+
+    def test_matches_brute_force(self):
+        rng = random.Random(0)
+        models = {rid: _random_periods_model(rng) for rid in range(1, 300)}
+        index = ActivityIndex()
+        for rid, model in models.items():
+            index.add(rid, model)
+        for rid in rng.sample(sorted(models), 50):
+            index.remove(rid)
+            del models[rid]
+
+        def active(a, b):
+            return {rid for rid, model in models.items()
+                    for begin, end in model.active_intervals() if begin < b and a < end}
+
+        for t in range(0, 2880, 7):
+            self.assertEqual(index.active_at(t), active(t, t + 1), t)
+        for _ in range(200):
+            a = rng.randrange(2880)
+            b = a + rng.randint(1, 120)
+            self.assertEqual(index.active_between(a, b), active(a, b), (a, b))
+            self.assertEqual(index.active_between(a, a), set())
+
+
+if __name__ == '__main__':
+    unittest.main()